@@ -0,0 +1,56 @@
+# batch.py - THROUGHPUT METRICS FOR BATCH ROADMAP GENERATION
+import threading
+from collections import deque
+
+
+class BatchMetrics:
+    """Running totals plus per-concurrency throughput, for sizing against upstream rate limits"""
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.unique_items = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.by_concurrency = {}
+        self.recent = deque(maxlen=recent)
+
+    def record(self, items: int, unique_items: int, errors: int, concurrency: int, seconds: float):
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self.unique_items += unique_items
+            self.errors += errors
+            self.seconds += seconds
+
+            level = self.by_concurrency.setdefault(concurrency, {"batches": 0, "unique_items": 0, "seconds": 0.0})
+            level["batches"] += 1
+            level["unique_items"] += unique_items
+            level["seconds"] += seconds
+
+            self.recent.append({
+                "items": items,
+                "unique_items": unique_items,
+                "errors": errors,
+                "concurrency": concurrency,
+                "seconds": round(seconds, 4),
+                "items_per_second": round(items / seconds, 2) if seconds > 0 else None
+            })
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "unique_items": self.unique_items,
+                "deduplicated_items": self.items - self.unique_items,
+                "errors": self.errors,
+                "items_per_second": round(self.items / self.seconds, 2) if self.seconds > 0 else None,
+                # unique items are the ones that reach the LLM, so this is the upstream call rate
+                "unique_items_per_second_by_concurrency": {
+                    str(c): round(level["unique_items"] / level["seconds"], 2) if level["seconds"] > 0 else None
+                    for c, level in sorted(self.by_concurrency.items())
+                },
+                "recent": list(self.recent)
+            }
@@ -0,0 +1,103 @@
+# bench_hedging.py - TAIL LATENCY OF THE LLM ROUTER WITH AND WITHOUT HEDGING
+#
+# Run: python benchmarks/bench_hedging.py [--requests 300] [--hedge-after 0.3] [--json]
+#
+# Starts two mock OpenRouter backends whose latency has a slow tail
+# (--tail-rate of calls take --tail-latency extra seconds), then sends the
+# same workload through LLMRouter once with hedging disabled and once with
+# it enabled, and reports p50/p95/p99 per mode.
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from loadtest import free_port, running, summarize  # noqa: E402
+
+from llm_client import AsyncLLMClient  # noqa: E402
+from llm_router import Backend, LLMRouter  # noqa: E402
+
+PAYLOAD = {
+    "messages": [
+        {"role": "system", "content": "Return ONLY JSON."},
+        {"role": "user", "content": "Goal: learn python"}
+    ]
+}
+
+
+def parse(result: dict) -> dict:
+    return json.loads(result["choices"][0]["message"]["content"])
+
+
+async def run_mode(urls: list, hedge_after: float, args) -> dict:
+    backends = [
+        Backend(f"mock{i}", AsyncLLMClient("bench", base_url=url, max_attempts=1), "mock-model")
+        for i, url in enumerate(urls)
+    ]
+    router = LLMRouter(backends, hedge_after=hedge_after, explore=0.1)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                await router.chat(PAYLOAD, parse=parse)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    result = summarize(latencies, errors, time.perf_counter() - started)
+    result["hedges"] = router.hedges
+    result["hedge_wins"] = router.hedge_wins
+    await router.aclose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM router hedging benchmark")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.1, help="mock base latency in seconds")
+    parser.add_argument("--tail-rate", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.5)
+    parser.add_argument("--hedge-after", type=float, default=0.3)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    ports = [free_port(), free_port()]
+    mocks = [
+        [sys.executable, os.path.join(HERE, "mock_openrouter.py"), "--port", str(port), "--seed", str(i),
+         "--latency", str(args.latency), "--jitter", str(args.latency / 4),
+         "--tail-rate", str(args.tail_rate), "--tail-latency", str(args.tail_latency)]
+        for i, port in enumerate(ports)
+    ]
+    urls = [f"http://127.0.0.1:{port}/api/v1" for port in ports]
+
+    with running(mocks[0], dict(os.environ), f"http://127.0.0.1:{ports[0]}/docs"), \
+            running(mocks[1], dict(os.environ), f"http://127.0.0.1:{ports[1]}/docs"):
+        results = {
+            "no_hedge": asyncio.run(run_mode(urls, 0, args)),
+            "hedged": asyncio.run(run_mode(urls, args.hedge_after, args))
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<10} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'hedges':>7} {'won':>5}")
+    for mode, row in results.items():
+        print(f"{mode:<10} {row['p50_ms']:>8} {row['p95_ms']:>8} {row['p99_ms']:>8} {row['max_ms']:>8} "
+              f"{row['hedges']:>7} {row['hedge_wins']:>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# bench_response_assembly.py - PER-REQUEST CPU AND ALLOCATIONS FOR ROADMAP SERIALIZATION
+#
+# Run: python benchmarks/bench_response_assembly.py [--repeat 5000] [--json]
+#
+# "dict" is the old path: build the roadmap dict with enhance_with_real_content,
+# then jsonable_encoder + JSONResponse as FastAPI does by default.
+# "spliced" is render_roadmap_json: cached per-topic fragments plus the
+# request fields. The fallback roadmap is measured the same way.
+import argparse
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+os.environ.setdefault("ROADMAP_STORE", "memory")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import main  # noqa: E402
+import templates  # noqa: E402
+
+
+def measure(fn, repeat: int) -> dict:
+    """CPU time per call, and peak bytes allocated while one call runs"""
+    fn()  # warm caches
+    seconds = timeit.timeit(fn, number=repeat)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"us_per_call": round(seconds / repeat * 1e6, 2), "peak_bytes": peak}
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Roadmap response assembly benchmark")
+    parser.add_argument("--repeat", type=int, default=5000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    user_input = main.EnhancedUserInput(goal="learn python", proficiency="beginner",
+                                        time_commitment="10 hours per week", learning_style=["video"])
+    topic = main.detect_topic(user_input.goal)
+    structure = main.create_basic_structure(user_input)
+    content = main.catalog.current
+
+    def dict_path():
+        roadmap = main.enhance_with_real_content(structure, topic, user_input, content)
+        roadmap.update(roadmap_id="abcd1234", generated_at="2026-01-01T00:00:00", topic=topic)
+        return JSONResponse(jsonable_encoder(roadmap)).body
+
+    def spliced_path():
+        return main.render_roadmap_json(structure, topic, "abcd1234", "2026-01-01T00:00:00", content)
+
+    def fallback_dict_path():
+        return JSONResponse(jsonable_encoder(main.create_fallback_roadmap(user_input, topic))).body
+
+    def fallback_spliced_path():
+        return main.render_fallback_json(user_input, topic)
+
+    assert json.loads(dict_path()) == json.loads(spliced_path())
+
+    results = {
+        "roadmap": {"dict": measure(dict_path, args.repeat), "spliced": measure(spliced_path, args.repeat)},
+        "fallback": {"dict": measure(fallback_dict_path, args.repeat),
+                     "spliced": measure(fallback_spliced_path, args.repeat)},
+        "orjson": templates.orjson is not None
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'case':<10} {'path':<8} {'us/call':>10} {'peak bytes':>12}")
+    for case in ("roadmap", "fallback"):
+        for path in ("dict", "spliced"):
+            row = results[case][path]
+            print(f"{case:<10} {path:<8} {row['us_per_call']:>10} {row['peak_bytes']:>12}")
+    print(f"orjson: {results['orjson']}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,123 @@
+# bench_startup.py - IMPORT-TIME AND COLD-START BUDGET CHECK
+#
+# Run: python benchmarks/bench_startup.py [--runs 5] [--import-budget-ms 800] [--ready-budget-ms 1500] [--json]
+#
+# Measures, over --runs fresh processes each:
+#   import_ms       time to `import main` (frameworks included)
+#   listening_ms    process start until /healthz answers
+#   ready_ms        process start until /readyz answers 200 (catalog, cache and LLM pool warm)
+#   first_request_ms  one POST /generate-roadmap right after ready
+# against a mock OpenRouter backend and a throwaway SQLite store, and exits
+# non-zero when the median import or ready time is over its budget.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from loadtest import ROOT, free_port, running  # noqa: E402
+
+IMPORT_PROBE = "import time; t = time.perf_counter(); import main; print((time.perf_counter() - t) * 1000)"
+REQUEST = {"goal": "learn python", "proficiency": "beginner", "time_commitment": "5h", "learning_style": ["video"]}
+
+
+def app_env(mock_port: int) -> dict:
+    workdir = tempfile.mkdtemp(prefix="roadmap-startup-")
+    return {
+        **os.environ,
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{mock_port}/api/v1",
+        "ROADMAP_STORE": "sqlite",
+        "ROADMAP_DB_PATH": os.path.join(workdir, "roadmaps.db"),
+        "ROADMAP_CACHE_PATH": os.path.join(workdir, "cache.db"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.db"),
+    }
+
+
+def measure_import(env: dict) -> float:
+    out = subprocess.check_output([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, env=env, text=True)
+    return float(out.strip().splitlines()[-1])
+
+
+def poll(client: httpx.Client, path: str, started: float, timeout: float = 30.0) -> float:
+    """Milliseconds from started until path answers 200"""
+    deadline = started + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if client.get(path).status_code == 200:
+                return (time.perf_counter() - started) * 1000
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} did not answer 200 within {timeout}s")
+
+
+def measure_cold_start(env: dict) -> dict:
+    port = free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            listening = poll(client, "/healthz", started)
+            ready = poll(client, "/readyz", started)
+            t0 = time.perf_counter()
+            client.post("/generate-roadmap", json=REQUEST).raise_for_status()
+            first_request = (time.perf_counter() - t0) * 1000
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {"listening_ms": listening, "ready_ms": ready, "first_request_ms": first_request}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time and cold-start budget check")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=800.0)
+    parser.add_argument("--ready-budget-ms", type=float, default=1500.0)
+    parser.add_argument("--mock-latency", type=float, default=0.1)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock_cmd = [sys.executable, os.path.join(HERE, "mock_openrouter.py"), "--port", str(mock_port),
+                "--latency", str(args.mock_latency)]
+    samples = {"import_ms": [], "listening_ms": [], "ready_ms": [], "first_request_ms": []}
+    with running(mock_cmd, dict(os.environ), f"http://127.0.0.1:{mock_port}/docs"):
+        for _ in range(args.runs):
+            env = app_env(mock_port)
+            samples["import_ms"].append(measure_import(env))
+            for name, value in measure_cold_start(env).items():
+                samples[name].append(value)
+
+    results = {
+        name: {"median": round(statistics.median(values), 1), "max": round(max(values), 1)}
+        for name, values in samples.items()
+    }
+    budgets = {"import_ms": args.import_budget_ms, "ready_ms": args.ready_budget_ms}
+    over = {name: results[name]["median"] for name, budget in budgets.items() if results[name]["median"] > budget}
+
+    if args.json:
+        print(json.dumps({"results": results, "budgets": budgets, "over_budget": over}, indent=2))
+    else:
+        print(f"{'metric':<18} {'median_ms':>10} {'max_ms':>9} {'budget_ms':>10}")
+        for name, row in results.items():
+            budget = budgets.get(name, "")
+            print(f"{name:<18} {row['median']:>10} {row['max']:>9} {budget:>10}")
+        print("OVER BUDGET: " + ", ".join(over) if over else "within budget")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
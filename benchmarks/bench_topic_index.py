@@ -0,0 +1,69 @@
+# bench_topic_index.py - TOPIC CLASSIFICATION COST VS. NUMBER OF TOPICS
+#
+# Run: python benchmarks/bench_topic_index.py [--repeat 2000] [--json]
+#
+# Compares the compiled TopicIndex against the old approach (substring any()
+# scans over each topic's keyword list in order) as the table grows.
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topic_index import TOPIC_KEYWORDS, TopicIndex  # noqa: E402
+
+GOALS = [
+    "learn python",
+    "become a full stack web developer with react and node",
+    "machine learning and data science for beginners",
+    "i want to get better at something new this year",
+    "topic 997 keyword 5 and more words to scan through",
+]
+
+
+def synthetic_table(topic_count: int, keywords_per_topic: int = 10) -> dict:
+    table = dict(TOPIC_KEYWORDS)
+    for t in range(topic_count - len(table)):
+        table[f"topic{t}"] = {f"topic {t} keyword {k}": 1 for k in range(keywords_per_topic)}
+    return table
+
+
+def linear_scan(table: dict, goal: str) -> str:
+    goal_lower = goal.lower()
+    for topic, keywords in table.items():
+        if any(word in goal_lower for word in keywords):
+            return topic
+    return "general"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Topic classification benchmark")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for topic_count in (3, 10, 100, 1000, 5000):
+        table = synthetic_table(topic_count)
+        index = TopicIndex(table)
+        calls = args.repeat * len(GOALS)
+        indexed = timeit.timeit(lambda: [index.classify(g) for g in GOALS], number=args.repeat)
+        scanned = timeit.timeit(lambda: [linear_scan(table, g) for g in GOALS], number=args.repeat)
+        results.append({
+            "topics": len(table),
+            "indexed_us": round(indexed / calls * 1e6, 2),
+            "linear_scan_us": round(scanned / calls * 1e6, 2)
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'topics':>8} {'indexed (us)':>14} {'linear scan (us)':>18}")
+    for row in results:
+        print(f"{row['topics']:>8} {row['indexed_us']:>14} {row['linear_scan_us']:>18}")
+
+
+if __name__ == "__main__":
+    main()
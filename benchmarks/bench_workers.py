@@ -0,0 +1,143 @@
+# bench_workers.py - RPS SCALING ACROSS UVICORN WORKER PROCESSES
+#
+# Run: python benchmarks/bench_workers.py [--workers 1,2,4] [--duration 10] [--json]
+#
+# For each worker count, starts the app with `python main.py` and
+# WEB_CONCURRENCY=N against a fresh SQLite store and LLM cache, seeds
+# roadmaps through the mock OpenRouter backend, then drives a fixed-duration
+# mix of GET /roadmap/{id}, POST /update-progress and cache-hit
+# POST /generate-roadmap from --clients load processes. Roadmaps created on
+# one worker are read and updated on the others, so any error means state is
+# not shared. Reports RPS, latency and scaling efficiency (RPS / (N * RPS at 1)).
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from loadtest import free_port, running, summarize  # noqa: E402
+
+
+async def seed(base_url: str, corpus: list, count: int) -> list:
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        responses = await asyncio.gather(*(client.post("/generate-roadmap", json=corpus[i % len(corpus)])
+                                           for i in range(count)))
+    return [r.json()["roadmap_id"] for r in responses]
+
+
+async def drive(base_url: str, corpus: list, ids: list, duration: float, concurrency: int, seed_value: int) -> tuple:
+    rng = random.Random(seed_value)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    def next_request():
+        roll = rng.random()
+        if roll < 0.6:
+            return "GET", f"/roadmap/{rng.choice(ids)}", None
+        if roll < 0.8:
+            return "POST", "/update-progress", {
+                "roadmap_id": rng.choice(ids), "week_completed": rng.randint(1, 4), "project_done": rng.random() < 0.5
+            }
+        return "POST", "/generate-roadmap", rng.choice(corpus)
+
+    async def loop(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            method, url, body = next_request()
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            if response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - t0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(loop(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(job: tuple) -> tuple:
+    return asyncio.run(drive(*job))
+
+
+def run_workers(workers: int, corpus: list, mock_port: int, args) -> dict:
+    app_port = free_port()
+    workdir = tempfile.mkdtemp(prefix="roadmap-workers-")
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "ROADMAP_PORT": str(app_port),
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{mock_port}/api/v1",
+        "ROADMAP_STORE": "sqlite",
+        "ROADMAP_DB_PATH": os.path.join(workdir, "roadmaps.db"),
+        "ROADMAP_CACHE_PATH": os.path.join(workdir, "cache.db"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.db"),
+    }
+    base_url = f"http://127.0.0.1:{app_port}"
+    with running([sys.executable, "main.py"], env, f"{base_url}/"):
+        ids = asyncio.run(seed(base_url, corpus, args.roadmaps))
+        jobs = [(base_url, corpus, ids, args.duration, args.concurrency, i) for i in range(args.clients)]
+        started = time.perf_counter()
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(client_process, jobs)
+        elapsed = time.perf_counter() - started
+    latencies = [v for lat, _ in results for v in lat]
+    return summarize(latencies, sum(e for _, e in results), elapsed)
+
+
+def main():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, *(n for n in (2, 4, 8, 16) if n <= cores), cores})
+    parser = argparse.ArgumentParser(description="Worker-process scaling benchmark")
+    parser.add_argument("--workers", default=",".join(map(str, default_workers)), help="comma-separated worker counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=max(2, cores), help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="connections per load generator")
+    parser.add_argument("--roadmaps", type=int, default=50, help="roadmaps seeded before the timed run")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "corpus.jsonl"))
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    mock_port = free_port()
+    mock_cmd = [sys.executable, os.path.join(HERE, "mock_openrouter.py"), "--port", str(mock_port)]
+    results = {}
+    with running(mock_cmd, dict(os.environ), f"http://127.0.0.1:{mock_port}/docs"):
+        for workers in (int(n) for n in args.workers.split(",")):
+            results[workers] = run_workers(workers, corpus, mock_port, args)
+
+    base = results[min(results)]["rps"] / min(results)
+    for workers, row in results.items():
+        row["speedup"] = round(row["rps"] / results[min(results)]["rps"], 2)
+        row["efficiency"] = round(row["rps"] / (workers * base), 2)
+
+    if args.json:
+        print(json.dumps({"cores": cores, "results": results}, indent=2))
+        return
+    print(f"cores: {cores}")
+    print(f"{'workers':>7} {'rps':>9} {'p50_ms':>8} {'p99_ms':>8} {'errors':>7} {'speedup':>8} {'efficiency':>10}")
+    for workers, row in results.items():
+        print(f"{workers:>7} {row['rps']:>9} {row['p50_ms']:>8} {row['p99_ms']:>8} {row['errors']:>7} "
+              f"{row['speedup']:>8} {row['efficiency']:>10}")
+
+
+if __name__ == "__main__":
+    main()
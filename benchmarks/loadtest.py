@@ -0,0 +1,259 @@
+# loadtest.py - THROUGHPUT AND TAIL-LATENCY BENCHMARK WITH A MOCK LLM BACKEND
+#
+# Run:      python benchmarks/loadtest.py --requests 500 --concurrency 32 --output bench.json
+# Compare:  python benchmarks/loadtest.py --requests 500 --compare bench.json
+#
+# Starts benchmarks/mock_openrouter.py and the app (uvicorn main:app) as
+# subprocesses against a throwaway SQLite store, replays the JSONL corpus of
+# EnhancedUserInput against /generate-roadmap, then exercises
+# /update-progress, /roadmap/{id} and /visual-timeline/{id} for the created
+# roadmaps. Reports RPS and p50/p95/p99 per endpoint, plus app RSS and store
+# size sampled over the run, as JSON.
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url: str, timeout: float = 20.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+@contextmanager
+def running(cmd: list, env: dict, health_url: str):
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(health_url)
+        yield proc
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: list, errors: int, seconds: float) -> dict:
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(values) + errors,
+        "errors": errors,
+        "rps": round((len(values) + errors) / seconds, 2) if seconds > 0 else None,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0
+    }
+
+
+def rss_kb(pid: int):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def store_size(db_path: str) -> dict:
+    size = sum(os.path.getsize(p) for p in (db_path, db_path + "-wal") if os.path.exists(p))
+    try:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=1)
+        roadmaps = conn.execute("SELECT COUNT(*) FROM roadmaps").fetchone()[0]
+        conn.close()
+    except sqlite3.Error:
+        roadmaps = None
+    return {"db_bytes": size, "roadmaps": roadmaps}
+
+
+async def sample_memory(pid: int, db_path: str, started: float, samples: list, interval: float):
+    while True:
+        samples.append({"t": round(time.perf_counter() - started, 2), "rss_kb": rss_kb(pid), **store_size(db_path)})
+        await asyncio.sleep(interval)
+
+
+async def run_phase(client: httpx.AsyncClient, make_requests, concurrency: int) -> dict:
+    """Send (method, url, body) requests with bounded concurrency; returns stats and response bodies"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, bodies = [], []
+    errors = 0
+
+    async def one(method: str, url: str, body):
+        nonlocal errors
+        async with semaphore:
+            t0 = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+            except httpx.HTTPError:
+                errors += 1
+                return
+            elapsed = time.perf_counter() - t0
+        if response.status_code >= 400:
+            errors += 1
+            return
+        latencies.append(elapsed)
+        bodies.append(response.json())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(*req) for req in make_requests))
+    return {"stats": summarize(latencies, errors, time.perf_counter() - started), "bodies": bodies}
+
+
+async def drive(base_url: str, corpus: list, args, app_pid: int, db_path: str) -> dict:
+    rng = random.Random(args.seed)
+    samples = []
+    started = time.perf_counter()
+    sampler = asyncio.create_task(sample_memory(app_pid, db_path, started, samples, args.sample_interval))
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        generate = await run_phase(
+            client, [("POST", "/generate-roadmap", corpus[i % len(corpus)]) for i in range(args.requests)], args.concurrency
+        )
+        ids = [body["roadmap_id"] for body in generate["bodies"]]
+        if not ids:
+            raise RuntimeError("no roadmaps were generated; check the app and mock settings")
+
+        updates = [
+            ("POST", "/update-progress", {
+                "roadmap_id": rng.choice(ids),
+                "week_completed": rng.randint(1, 4),
+                "project_done": rng.random() < 0.5,
+                "notes": "benchmark note" if rng.random() < 0.2 else None
+            })
+            for _ in range(args.requests)
+        ]
+        update_progress = await run_phase(client, updates, args.concurrency)
+        get_roadmap = await run_phase(client, [("GET", f"/roadmap/{rng.choice(ids)}", None) for _ in range(args.requests)], args.concurrency)
+        timeline = await run_phase(client, [("GET", f"/visual-timeline/{rng.choice(ids)}", None) for _ in range(args.requests)], args.concurrency)
+
+    await asyncio.sleep(0)
+    sampler.cancel()
+    samples.append({"t": round(time.perf_counter() - started, 2), "rss_kb": rss_kb(app_pid), **store_size(db_path)})
+
+    return {
+        "endpoints": {
+            "/generate-roadmap": generate["stats"],
+            "/update-progress": update_progress["stats"],
+            "/roadmap/{id}": get_roadmap["stats"],
+            "/visual-timeline/{id}": timeline["stats"]
+        },
+        "memory": samples
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict):
+    print(f"{'endpoint':<24} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>9}")
+    for endpoint, stats in current["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(endpoint)
+        if not base:
+            continue
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            old, new = base.get(metric), stats.get(metric)
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"{endpoint:<24} {metric:<8} {old:>10} {new:>10} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roadmap service load test")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "corpus.jsonl"))
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--mock-latency", type=float, default=0.2)
+    parser.add_argument("--mock-jitter", type=float, default=0.05)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the app")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between memory samples")
+    parser.add_argument("--output", help="write the JSON report here as well as stdout")
+    parser.add_argument("--compare", help="baseline JSON report to diff against")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        corpus = [json.loads(line) for line in f if line.strip()]
+
+    mock_port, app_port = free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix="roadmap-bench-")
+    db_path = os.path.join(workdir, "roadmaps.db")
+    env = {
+        **os.environ,
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"http://127.0.0.1:{mock_port}/api/v1",
+        "ROADMAP_STORE": "sqlite",
+        "ROADMAP_DB_PATH": db_path,
+        "ROADMAP_CACHE_PATH": os.path.join(workdir, "cache.db"),
+        "JOBS_DB_PATH": os.path.join(workdir, "jobs.db"),
+    }
+
+    mock_cmd = [sys.executable, os.path.join(HERE, "mock_openrouter.py"), "--port", str(mock_port),
+                "--latency", str(args.mock_latency), "--jitter", str(args.mock_jitter),
+                "--error-rate", str(args.mock_error_rate), "--seed", str(args.seed)]
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port),
+               "--log-level", "warning", "--workers", str(args.workers)]
+
+    with running(mock_cmd, env, f"http://127.0.0.1:{mock_port}/docs"), \
+            running(app_cmd, env, f"http://127.0.0.1:{app_port}/") as app:
+        result = asyncio.run(drive(f"http://127.0.0.1:{app_port}", corpus, args, app.pid, db_path))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        **result
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# mock_openrouter.py - LOCAL FAKE OPENROUTER SERVER FOR TESTING AND BENCHMARKS
+#
+# Run:   python benchmarks/mock_openrouter.py --port 8001 --latency 0.5 --error-rate 0.1
+# Then:  OPENROUTER_API_KEY=test OPENROUTER_BASE_URL=http://127.0.0.1:8001/api/v1 uvicorn main:app
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def build_structure(goal: str, weeks: int = 4, first: int = 1) -> dict:
+    """Deterministic roadmap structure for a goal, weeks numbered from first"""
+    numbers = range(first - 1, first - 1 + weeks)
+    return {
+        "title": f"Mock Roadmap: {goal}",
+        "overview": f"A {weeks}-week mock plan for {goal}.",
+        "weekly_themes": [f"Theme {i + 1}" for i in numbers],
+        "weekly_focus": [f"Focus {i + 1}" for i in numbers],
+        "weekly_objectives": [[f"Obj {i * 2 + 1}", f"Obj {i * 2 + 2}"] for i in numbers]
+    }
+
+
+def build_week_major(goal: str, weeks: int = 4) -> dict:
+    """Same plan in the week-major layout requested by the streaming prompt"""
+    structure = build_structure(goal, weeks)
+    return {
+        "title": structure["title"],
+        "overview": structure["overview"],
+        "weeks": [
+            {"theme": t, "focus": f, "objectives": o}
+            for t, f, o in zip(structure["weekly_themes"], structure["weekly_focus"], structure["weekly_objectives"])
+        ]
+    }
+
+
+def completion(content: str, model: str) -> dict:
+    return {
+        "id": "mock-completion",
+        "object": "chat.completion",
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 150, "completion_tokens": len(content) // 4, "total_tokens": 150 + len(content) // 4}
+    }
+
+
+async def stream_chunks(content: str, model: str, chunk_size: int, chunk_delay: float):
+    """OpenAI-style SSE stream of content deltas"""
+    for start in range(0, len(content), chunk_size):
+        chunk = {"model": model, "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        if chunk_delay:
+            await asyncio.sleep(chunk_delay)
+    yield "data: [DONE]\n\n"
+
+
+def create_app(latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0,
+               chunk_size: int = 16, chunk_delay: float = 0.0, tail_rate: float = 0.0,
+               tail_latency: float = 0.0) -> FastAPI:
+    """Build the mock app; latency and failures are drawn from a seeded RNG"""
+    app = FastAPI(title="Mock OpenRouter")
+    rng = random.Random(seed)
+    app.state.calls = 0
+
+    @app.post("/api/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.calls += 1
+        delay = max(0.0, latency + rng.uniform(-jitter, jitter))
+        if rng.random() < tail_rate:
+            delay += tail_latency
+        fail = rng.random() < error_rate
+
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            return JSONResponse(status_code=503, content={"error": {"message": "mock upstream error"}})
+
+        prompt = body["messages"][-1]["content"]
+        match = re.search(r"Goal:\s*(.+)", prompt)
+        goal = match.group(1).strip() if match else "something"
+        model = body.get("model", "mock")
+        page = re.search(r"Return weeks (\d+)-(\d+)", prompt)
+        if '"weeks"' in body["messages"][0]["content"]:
+            content = json.dumps(build_week_major(goal))
+        elif page:
+            first, last = int(page.group(1)), int(page.group(2))
+            content = json.dumps(build_structure(goal, last - first + 1, first))
+        else:
+            content = json.dumps(build_structure(goal))
+
+        if body.get("stream"):
+            return StreamingResponse(stream_chunks(content, model, chunk_size, chunk_delay), media_type="text/event-stream")
+        return completion(content, model)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local fake OpenRouter server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- jitter in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=16, help="characters per streamed delta")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed deltas")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of calls that are slow")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="extra seconds added to slow calls")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.jitter, args.error_rate, args.seed, args.chunk_size, args.chunk_delay,
+                     args.tail_rate, args.tail_latency)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -0,0 +1,261 @@
+# cache.py - RESPONSE CACHE FOR GENERATED ROADMAP STRUCTURES
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_text(value: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(re.sub(r"[^\w\s+#]", " ", value.lower()).split())
+
+
+def cache_key(goal: str, proficiency: str, time_commitment: str, learning_style: list, weeks: int = 4) -> str:
+    """Stable key for inputs that should share one generated structure"""
+    normalized = {
+        "goal": normalize_text(goal),
+        "proficiency": normalize_text(proficiency),
+        "time_commitment": normalize_text(time_commitment),
+        "learning_style": sorted({normalize_text(s) for s in learning_style if s.strip()}),
+        "weeks": weeks
+    }
+    raw = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry expiry, optionally snapshotted to a file across restarts"""
+
+    # Lookups never wait on I/O, so async callers can use them directly
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024, snapshot_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.snapshot_path = snapshot_path
+        self.expirations = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float) -> int:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            evicted = 0
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def load(self) -> int:
+        """Read unexpired entries from the snapshot file, oldest first; returns how many were loaded"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return 0
+        now = time.time()
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        with self._lock:
+            # Newest to oldest, each pushed to the least-recent end, so entries set since startup stay ahead
+            for key, value, expires_at in reversed(entries[-self.max_entries:]):
+                if expires_at > now and key not in self._data:
+                    self._data[key] = (value, expires_at)
+                    self._data.move_to_end(key, last=False)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            return len(self._data)
+
+    def save(self) -> int:
+        """Write the entries to the snapshot file in LRU order; returns how many were written"""
+        if not self.snapshot_path:
+            return 0
+        with self._lock:
+            entries = [(key, value, expires_at) for key, (value, expires_at) in self._data.items()]
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.snapshot_path)
+        return len(entries)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteBackend:
+    """On-disk LRU, survives restarts and can be shared between worker processes
+
+    Hits refresh last_access at most once per touch_interval seconds, so
+    concurrent readers in other workers are not serialized behind a write
+    on every lookup; eviction order is exact to within that interval.
+    """
+
+    # Lookups can wait up to the busy timeout on another process's write lock
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int = 10000, touch_interval: float = 30.0):
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_last_access ON response_cache(last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, last_access FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self.expirations += 1
+                return None
+            if now - row[2] >= self.touch_interval:
+                self._conn.execute("UPDATE response_cache SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: float) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            overflow = len(self) - self.max_entries
+            if overflow <= 0:
+                return 0
+            self._conn.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY last_access LIMIT ?)", (overflow,)
+            )
+            return overflow
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+    def load(self) -> int:
+        """Read the most recently used entries once so their pages are cached before traffic arrives"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT length(value) FROM response_cache WHERE expires_at > ? ORDER BY last_access DESC LIMIT ?",
+                (time.time(), self.max_entries)
+            ).fetchall()
+        return len(rows)
+
+    def save(self) -> int:
+        # Every write is already on disk
+        return 0
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+
+class ResponseCache:
+    """TTL cache in front of the LLM call, with hit/miss/eviction counters"""
+
+    def __init__(self, backend, ttl: float = 86400):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self.saved_tokens = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        entry = json.loads(raw)
+        self.hits += 1
+        self.saved_seconds += entry.get("latency", 0.0)
+        self.saved_tokens += entry.get("tokens", 0)
+        return entry["structure"]
+
+    def set(self, key: str, structure: dict, latency: float = 0.0, tokens: int = 0):
+        raw = json.dumps({"structure": structure, "latency": latency, "tokens": tokens})
+        self.evictions += self.backend.set(key, raw, self.ttl)
+
+    async def aget(self, key: str) -> Optional[dict]:
+        """get for async callers; blocking backends run in a thread so the event loop never waits on a lock"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, structure: dict, latency: float = 0.0, tokens: int = 0):
+        if self.backend.blocking:
+            await asyncio.to_thread(self.set, key, structure, latency, tokens)
+        else:
+            self.set(key, structure, latency, tokens)
+
+    def warm(self) -> int:
+        """Load entries persisted by an earlier run; returns how many are available"""
+        return self.backend.load()
+
+    def save(self) -> int:
+        return self.backend.save()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.backend.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "saved_llm_seconds": round(self.saved_seconds, 3),
+            "saved_tokens": self.saved_tokens
+        }
+
+
+def cache_from_env() -> ResponseCache:
+    """Build the cache from ROADMAP_CACHE_* environment settings
+
+    The backend follows ROADMAP_STORE unless set: with the SQLite store it is
+    SQLite too, so under any number of worker processes (however uvicorn or
+    gunicorn was told to start them) a structure generated by one worker is a
+    cache hit in all of them.
+    """
+    backend_name = os.getenv("ROADMAP_CACHE_BACKEND", os.getenv("ROADMAP_STORE", "sqlite"))
+    max_entries = int(os.getenv("ROADMAP_CACHE_MAX_ENTRIES", "1024"))
+    if backend_name == "sqlite":
+        backend = SQLiteBackend(os.getenv("ROADMAP_CACHE_PATH", "roadmap_cache.db"), max_entries)
+    elif backend_name == "memory":
+        backend = MemoryBackend(max_entries, os.getenv("ROADMAP_CACHE_SNAPSHOT"))
+    else:
+        raise ValueError(f"Unknown ROADMAP_CACHE_BACKEND: {backend_name}")
+    return ResponseCache(backend, ttl=float(os.getenv("ROADMAP_CACHE_TTL", "86400")))
@@ -0,0 +1,109 @@
+# catalog.py - EXTERNAL RESOURCE AND PROJECT CATALOG WITH PRECOMPUTED INDEXES
+import heapq
+import json
+import os
+import threading
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_TOPIC = "python"
+
+
+class CatalogSnapshot:
+    """Immutable, fully indexed view of one version of the catalog file
+
+    Per-request selection is a dict lookup plus, for multi-type queries, a
+    merge of a few pre-sorted lists; nothing scans the whole catalog.
+    """
+
+    def __init__(self, data: dict, version: float = 0.0, default_topic: str = DEFAULT_TOPIC):
+        self.version = version
+        self.default_topic = default_topic
+        self._resources: Dict[str, List[dict]] = {}
+        self._resources_by_type: Dict[Tuple[str, str], List[Tuple[int, dict]]] = {}
+        self._projects: Dict[str, List[dict]] = {}
+        self._projects_by_skill: Dict[str, List[dict]] = {}
+
+        for topic, entries in data.get("resources", {}).items():
+            self._resources[topic] = entries
+            for position, entry in enumerate(entries):
+                self._resources_by_type.setdefault((topic, entry["type"]), []).append((position, entry))
+
+        for topic, entries in data.get("projects", {}).items():
+            self._projects[topic] = entries
+            for entry in entries:
+                for skill in entry.get("skills", []):
+                    self._projects_by_skill.setdefault(skill.lower(), []).append(entry)
+
+        self.size = sum(map(len, self._resources.values())) + sum(map(len, self._projects.values()))
+
+    def _topic(self, index: dict, topic: str) -> str:
+        return topic if topic in index else self.default_topic
+
+    def resources(self, topic: str, types: Optional[Sequence[str]] = None,
+                  limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+        """Resources for a topic (falling back to the default topic), optionally of the given types, in catalog order"""
+        topic = self._topic(self._resources, topic)
+        stop = None if limit is None else offset + limit
+        if types is None:
+            return self._resources.get(topic, [])[offset:stop]
+        lists = [self._resources_by_type.get((topic, t), []) for t in dict.fromkeys(types)]
+        merged = heapq.merge(*lists, key=lambda item: item[0])
+        return [entry for _, entry in islice(merged, offset, stop)]
+
+    def projects(self, topic: str, limit: Optional[int] = None) -> List[dict]:
+        """Projects for a topic, falling back to the default topic"""
+        return self._projects.get(self._topic(self._projects, topic), [])[:limit]
+
+    def projects_with_skill(self, skill: str, limit: Optional[int] = None) -> List[dict]:
+        return self._projects_by_skill.get(skill.lower(), [])[:limit]
+
+
+class Catalog:
+    """Loads catalog.json and hot-swaps a new snapshot when the file changes
+
+    Nothing is read until load() (called during app startup) or the first
+    use of current, so importing the app stays cheap.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._current: Optional[CatalogSnapshot] = None
+
+    @property
+    def current(self) -> CatalogSnapshot:
+        return self._current or self.load()
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    def load(self) -> CatalogSnapshot:
+        """The current snapshot, reading the file if that has not happened yet"""
+        with self._lock:
+            if self._current is None:
+                self._current = self._load()
+            return self._current
+
+    def _load(self) -> CatalogSnapshot:
+        version = os.path.getmtime(self.path)
+        with open(self.path, encoding="utf-8") as f:
+            return CatalogSnapshot(json.load(f), version)
+
+    def reload_if_changed(self) -> bool:
+        """Swap in a freshly indexed snapshot if the file is newer; readers keep the old one until then"""
+        with self._lock:
+            if self._current is not None and os.path.getmtime(self.path) == self._current.version:
+                return False
+            self._current = self._load()
+            return True
+
+    def reload(self):
+        with self._lock:
+            self._current = self._load()
+
+
+def catalog_from_env() -> Catalog:
+    default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+    return Catalog(os.getenv("ROADMAP_CATALOG_PATH", default_path))
@@ -0,0 +1,150 @@
+# circuit_breaker.py - CIRCUIT BREAKER AND ADAPTIVE DEADLINE FOR AN UPSTREAM DEPENDENCY
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+
+class CircuitBreaker:
+    """Rolling-window breaker: closed -> open on a high error rate -> half-open trial calls -> closed
+
+    Successful call latencies in the window also drive an adaptive per-call
+    deadline (p99 * factor, clamped), so a slow-but-healthy upstream is not
+    given the full worst-case timeout on every call.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        window_seconds: float = 60.0,
+        min_calls: int = 10,
+        failure_threshold: float = 0.5,
+        open_seconds: float = 15.0,
+        half_open_max_calls: int = 1,
+        deadline_floor: float = 2.0,
+        deadline_ceiling: float = 30.0,
+        deadline_factor: float = 1.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.deadline_floor = deadline_floor
+        self.deadline_ceiling = deadline_ceiling
+        self.deadline_factor = deadline_factor
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, ok, latency)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; every allowed call must be followed by record_*()"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._trials < self.half_open_max_calls:
+                self._trials += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, latency: float):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._close()
+            self._record(True, latency)
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._record(False, latency)
+            total = len(self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            if self._state == self.CLOSED and total >= self.min_calls and failures / total >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """Give back an allowed call that ended without an outcome (e.g. the caller went away)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def deadline(self) -> float:
+        """Per-call deadline from the observed p99 of successful calls"""
+        with self._lock:
+            self._prune()
+            latencies = sorted(latency for _, ok, latency in self._calls if ok)
+        if len(latencies) < self.min_calls:
+            return self.deadline_ceiling
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        return max(self.deadline_floor, min(self.deadline_ceiling, p99 * self.deadline_factor))
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._maybe_half_open()
+            self._prune()
+            total = len(self._calls)
+            failures = sum(1 for _, ok, _ in self._calls if not ok)
+            state = self._state
+        return {
+            "state": state,
+            "window_calls": total,
+            "window_failure_rate": round(failures / total, 4) if total else 0.0,
+            "deadline_seconds": round(self.deadline(), 3),
+            "times_opened": self.opened,
+            "rejected_calls": self.rejected
+        }
+
+    def _record(self, ok: bool, latency: float):
+        self._calls.append((self._clock(), ok, latency))
+        self._prune()
+
+    def _prune(self):
+        cutoff = self._clock() - self.window_seconds
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def _maybe_half_open(self):
+        if self._state == self.OPEN and self._clock() >= self._opened_at + self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._trials = 0
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self.opened += 1
+
+    def _close(self):
+        self._state = self.CLOSED
+        self._calls.clear()
+
+
+def breaker_from_env(deadline_ceiling: float) -> CircuitBreaker:
+    """Build a breaker from CIRCUIT_* settings; the ceiling is the client's full attempt timeout"""
+    return CircuitBreaker(
+        window_seconds=float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60")),
+        min_calls=int(os.getenv("CIRCUIT_MIN_CALLS", "10")),
+        failure_threshold=float(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "0.5")),
+        open_seconds=float(os.getenv("CIRCUIT_OPEN_SECONDS", "15")),
+        half_open_max_calls=int(os.getenv("CIRCUIT_HALF_OPEN_CALLS", "1")),
+        deadline_floor=float(os.getenv("LLM_DEADLINE_FLOOR", "2")),
+        deadline_ceiling=deadline_ceiling,
+        deadline_factor=float(os.getenv("LLM_DEADLINE_FACTOR", "1.5")),
+    )
@@ -0,0 +1,386 @@
+# jobs.py - IN-PROCESS PRIORITY JOB QUEUE WITH POLLABLE RESULTS AND CALLBACKS
+import asyncio
+import ipaddress
+import itertools
+import json
+import logging
+import math
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable, Optional, Sequence, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger("roadmap.jobs")
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+class QueueFull(Exception):
+    """Raised by submit when the queue is at capacity"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class MemoryJobStore:
+    """Job records for a single process"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: dict):
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+
+    def update(self, job_id: str, **changes):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(changes)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def compact(self, ttl: timedelta) -> int:
+        cutoff = (datetime.now() - ttl).isoformat()
+        with self._lock:
+            expired = [jid for jid, job in self._jobs.items() if job["created_at"] < cutoff and job["status"] in (SUCCEEDED, FAILED)]
+            for jid in expired:
+                del self._jobs[jid]
+        return len(expired)
+
+    def fail_unfinished(self, error: str, job_ids: Optional[Iterable[str]] = None, older_than: Optional[timedelta] = None) -> int:
+        """Mark queued or running jobs failed: the given ids, or those created more than older_than ago"""
+        cutoff = (datetime.now() - older_than).isoformat() if older_than is not None else None
+        ids = set(job_ids) if job_ids is not None else None
+        failed = 0
+        with self._lock:
+            for jid, job in self._jobs.items():
+                if job["status"] not in (QUEUED, RUNNING):
+                    continue
+                if (ids is not None and jid in ids) or (cutoff is not None and job["created_at"] < cutoff):
+                    job.update(status=FAILED, error=error, finished_at=datetime.now().isoformat())
+                    failed += 1
+        return failed
+
+
+class SQLiteJobStore:
+    """Job records in SQLite (WAL), so any worker process can answer /jobs/{id}"""
+
+    COLUMNS = ["job_id", "status", "priority", "created_at", "started_at", "finished_at",
+               "result", "error", "callback_url", "callback_status"]
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, created_at TEXT NOT NULL, "
+        "started_at TEXT, finished_at TEXT, result TEXT, error TEXT, callback_url TEXT, callback_status TEXT)",
+        "CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at)",
+    ]
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, job: dict):
+        columns = [c for c in self.COLUMNS if c in job]
+        self._connection().execute(
+            "INSERT INTO jobs (%s) VALUES (%s)" % (",".join(columns), ",".join("?" * len(columns))),
+            [_column_value(job[c]) for c in columns]
+        )
+
+    def update(self, job_id: str, **changes):
+        self._connection().execute(
+            "UPDATE jobs SET %s WHERE job_id = ?" % ",".join(f"{c} = ?" for c in changes),
+            [*(_column_value(v) for v in changes.values()), job_id]
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT %s FROM jobs WHERE job_id = ?" % ",".join(self.COLUMNS), (job_id,)
+        ).fetchone()
+        return dict(zip(self.COLUMNS, row)) if row else None
+
+    def compact(self, ttl: timedelta) -> int:
+        cutoff = (datetime.now() - ttl).isoformat()
+        conn = self._connection()
+        return conn.execute(
+            "DELETE FROM jobs WHERE created_at < ? AND status IN (?, ?)", (cutoff, SUCCEEDED, FAILED)
+        ).rowcount
+
+    def fail_unfinished(self, error: str, job_ids: Optional[Iterable[str]] = None, older_than: Optional[timedelta] = None) -> int:
+        """Mark queued or running jobs failed: the given ids, or those created more than older_than ago"""
+        update = "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status IN (?, ?) AND "
+        params = [FAILED, error, datetime.now().isoformat(), QUEUED, RUNNING]
+        conn = self._connection()
+        if job_ids is not None:
+            return sum(conn.execute(update + "job_id = ?", [*params, job_id]).rowcount for job_id in job_ids)
+        cutoff = (datetime.now() - older_than).isoformat()
+        return conn.execute(update + "created_at < ?", [*params, cutoff]).rowcount
+
+
+def _column_value(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def callback_error(url: str, allowed_hosts: Sequence[str] = ()) -> Optional[str]:
+    """Why url must not be called back, or None if it may
+
+    With allowed_hosts only those hosts are accepted. Otherwise the host has
+    to resolve to public addresses only, so callbacks cannot reach loopback,
+    private, link-local (cloud metadata) or reserved ranges. Blocking (DNS).
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        return "callback_url is not a valid URL"
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "callback_url must be an absolute http(s) URL"
+    host = parts.hostname.lower()
+    if allowed_hosts:
+        return None if host in allowed_hosts else f"callback host {host} is not allowed"
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)}
+    except (socket.gaierror, UnicodeError):
+        return f"callback host {host} does not resolve"
+    for raw in addresses:
+        address = ipaddress.ip_address(raw.split("%")[0])
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        if not address.is_global:
+            return f"callback host {host} resolves to a non-public address"
+    return None
+
+
+class JobQueue:
+    """Bounded priority queue drained by a fixed pool of asyncio workers
+
+    run(payload) produces the job's JSON result as bytes. Higher priority
+    jobs are taken first, FIFO within a priority. submit() raises QueueFull
+    (with a Retry-After estimate from recent job durations) once max_queued
+    jobs are waiting. Finished jobs are POSTed to their callback URL, if any,
+    from a separate task so a slow receiver never holds a worker. Jobs left
+    unfinished by stop(), or by a process that died (older than stale_after),
+    are marked failed so pollers always reach a terminal state.
+    """
+
+    def __init__(self, store, run: Callable[[dict], Awaitable[bytes]], workers: int = 4, max_queued: int = 100,
+                 callback_timeout: float = 10.0, callback_attempts: int = 3, ttl: timedelta = timedelta(hours=1),
+                 stale_after: timedelta = timedelta(minutes=15), allowed_callback_hosts: Sequence[str] = ()):
+        self.store = store
+        self.run = run
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.callback_timeout = callback_timeout
+        self.callback_attempts = max(1, callback_attempts)
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self.allowed_callback_hosts = tuple(h.lower() for h in allowed_callback_hosts)
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._tasks = []
+        self._active = set()
+        self._deliveries = set()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._avg_seconds = 1.0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def start(self):
+        self._queue = asyncio.PriorityQueue()
+        self._http = httpx.AsyncClient(timeout=self.callback_timeout)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._compact_periodically()))
+
+    async def stop(self):
+        # Collected before cancelling, while running jobs are still listed as active
+        unfinished = set(self._active)
+        while not self._queue.empty():
+            unfinished.add(self._queue.get_nowait()[2])
+        tasks = self._tasks + list(self._deliveries)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        if unfinished:
+            await asyncio.to_thread(self.store.fail_unfinished, "server shut down before the job finished", unfinished)
+        if self._http is not None:
+            await self._http.aclose()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to free up"""
+        return max(1, math.ceil(self._avg_seconds * (self.queued + self.running) / self.workers / max(1, self.queued)))
+
+    async def check_callback(self, url: str) -> Optional[str]:
+        """callback_error for url against this queue's allowed hosts, resolved off the event loop"""
+        return await asyncio.to_thread(callback_error, url, self.allowed_callback_hosts)
+
+    async def submit(self, payload: dict, priority: int = 0, callback_url: Optional[str] = None) -> dict:
+        if self._queue is None:
+            raise RuntimeError("JobQueue.start() has not been called")
+        if self.queued >= self.max_queued:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "status": QUEUED,
+            "priority": priority,
+            "created_at": datetime.now().isoformat(),
+            "callback_url": callback_url
+        }
+        await asyncio.to_thread(self.store.create, job)
+        self._queue.put_nowait((-priority, next(self._sequence), job["job_id"], payload, callback_url))
+        return job
+
+    async def _worker(self):
+        while True:
+            _, _, job_id, payload, callback_url = await self._queue.get()
+            try:
+                await self._process(job_id, payload, callback_url)
+            except Exception:
+                # A store error (e.g. "database is locked") must not kill the worker; stale jobs are failed later
+                logger.exception("Job %s could not be recorded", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: str, payload: dict, callback_url: Optional[str]):
+        self.running += 1
+        self._active.add(job_id)
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.store.update, job_id, status=RUNNING, started_at=datetime.now().isoformat())
+            try:
+                result = await self.run(payload)
+            except Exception as e:
+                logger.exception("Job %s failed", job_id)
+                self.failed += 1
+                changes = {"status": FAILED, "error": str(e)}
+            else:
+                self.completed += 1
+                changes = {"status": SUCCEEDED, "result": result}
+            changes["finished_at"] = datetime.now().isoformat()
+            await asyncio.to_thread(self.store.update, job_id, **changes)
+        finally:
+            self.running -= 1
+            self._active.discard(job_id)
+            self._avg_seconds += 0.2 * (time.perf_counter() - started - self._avg_seconds)
+
+        if callback_url:
+            task = asyncio.create_task(self._callback(callback_url, job_id, changes))
+            self._deliveries.add(task)
+            task.add_done_callback(self._deliveries.discard)
+
+    async def _callback(self, url: str, job_id: str, changes: dict):
+        try:
+            status = await self._deliver(url, job_id, changes)
+            await asyncio.to_thread(self.store.update, job_id, callback_status=status)
+        except Exception:
+            logger.exception("Callback for job %s could not be recorded", job_id)
+
+    async def _deliver(self, url: str, job_id: str, changes: dict) -> str:
+        """POST the finished job to its callback URL with a few retries; returns the outcome"""
+        # Checked again at delivery, in case the host now resolves somewhere it should not
+        error = await self.check_callback(url)
+        if error is not None:
+            logger.warning("Callback for job %s refused: %s", job_id, error)
+            return f"refused ({error})"
+        body = job_body({"job_id": job_id, **changes})
+        last = "not attempted"
+        for attempt in range(1, self.callback_attempts + 1):
+            try:
+                response = await self._http.post(url, content=body, headers={"Content-Type": "application/json"})
+                if response.status_code < 400:
+                    return f"delivered ({response.status_code})"
+                last = f"status {response.status_code}"
+            except httpx.HTTPError as e:
+                last = type(e).__name__
+            if attempt < self.callback_attempts:
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+        logger.warning("Callback for job %s to %s failed: %s", job_id, url, last)
+        return f"failed ({last})"
+
+    async def _compact_periodically(self):
+        """Fail jobs orphaned by dead processes (first at startup), and drop expired records"""
+        while True:
+            try:
+                await asyncio.to_thread(self.store.fail_unfinished, "abandoned: the worker process stopped",
+                                        older_than=self.stale_after)
+                await asyncio.to_thread(self.store.compact, self.ttl)
+            except Exception:
+                logger.exception("Job store maintenance failed")
+            await asyncio.sleep(min(self.ttl.total_seconds(), self.stale_after.total_seconds(), 600))
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_job_seconds": round(self._avg_seconds, 3)
+        }
+
+
+def job_body(job: dict) -> bytes:
+    """A job record as JSON, with its stored result spliced in unparsed"""
+    result: Optional[Union[str, bytes]] = job.get("result")
+    meta = {k: v for k, v in job.items() if k != "result" and v is not None}
+    body = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    if result is None:
+        return body
+    if isinstance(result, str):
+        result = result.encode("utf-8")
+    return body[:-1] + b',"result":' + result + b"}"
+
+
+def jobs_from_env(run: Callable[[dict], Awaitable[bytes]]) -> JobQueue:
+    """Build the queue from JOBS_* environment settings (the store follows ROADMAP_STORE by default)"""
+    backend = os.getenv("JOBS_STORE", os.getenv("ROADMAP_STORE", "sqlite"))
+    if backend == "sqlite":
+        store = SQLiteJobStore(os.getenv("JOBS_DB_PATH", "jobs.db"))
+    elif backend == "memory":
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            raise ValueError("JOBS_STORE=memory is per process; use sqlite with WEB_CONCURRENCY > 1")
+        store = MemoryJobStore()
+    else:
+        raise ValueError(f"Unknown JOBS_STORE: {backend}")
+    return JobQueue(
+        store,
+        run,
+        workers=int(os.getenv("JOBS_WORKERS", "4")),
+        max_queued=int(os.getenv("JOBS_MAX_QUEUED", "100")),
+        callback_timeout=float(os.getenv("JOBS_CALLBACK_TIMEOUT", "10")),
+        ttl=timedelta(seconds=float(os.getenv("JOBS_TTL_SECONDS", "3600"))),
+        stale_after=timedelta(seconds=float(os.getenv("JOBS_STALE_SECONDS", "900"))),
+        allowed_callback_hosts=[h.strip() for h in os.getenv("JOBS_CALLBACK_HOSTS", "").split(",") if h.strip()]
+    )
@@ -0,0 +1,183 @@
+# llm_client.py - ASYNC, CONNECTION-POOLED CLIENT FOR THE OPENROUTER API
+import asyncio
+import json
+import os
+import random
+from typing import AsyncIterator, Optional
+
+import httpx
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Status codes worth retrying: rate limiting and transient upstream failures
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the LLM call fails after every attempt"""
+
+
+class LLMTimeout(LLMError):
+    """Raised when the last attempt failed by hitting its deadline"""
+
+
+class AsyncLLMClient:
+    """Shared keep-alive client with bounded concurrency, per-attempt deadlines and jittered retries"""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = OPENROUTER_BASE_URL,
+        max_connections: int = 32,
+        max_keepalive: int = 16,
+        max_concurrency: int = 16,
+        attempt_timeout: float = 10.0,
+        max_attempts: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive
+            ),
+            timeout=httpx.Timeout(attempt_timeout, connect=min(5.0, attempt_timeout)),
+            transport=transport,
+        )
+
+    async def chat(self, payload: dict, timeout: Optional[float] = None) -> dict:
+        """POST a chat completion and return the decoded JSON body"""
+        deadline = timeout or self.attempt_timeout
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    response = await asyncio.wait_for(
+                        self._client.post("/chat/completions", json=payload),
+                        timeout=deadline
+                    )
+                if response.status_code == 200:
+                    try:
+                        return response.json()
+                    except ValueError as e:
+                        raise LLMError(f"LLM returned a body that is not JSON: {response.text[:80]!r}") from e
+                if response.status_code not in RETRYABLE_STATUS:
+                    raise LLMError(f"LLM returned status {response.status_code}")
+                last_error = LLMError(f"LLM returned status {response.status_code}")
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            except (httpx.TransportError, asyncio.TimeoutError) as e:
+                last_error = e
+
+            if attempt < self.max_attempts:
+                delay = self.backoff_delay(attempt)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, self.backoff_max))
+                await asyncio.sleep(delay)
+
+        error_type = LLMTimeout if isinstance(last_error, (asyncio.TimeoutError, httpx.TimeoutException)) else LLMError
+        raise error_type(f"LLM call failed after {self.max_attempts} attempts: {last_error!r}") from last_error
+
+    async def stream_chat(self, payload: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream a chat completion, yielding content deltas as they arrive
+
+        Retries only happen before the first delta; once content has been
+        yielded a failure is raised to the caller.
+        """
+        payload = {**payload, "stream": True}
+        deadline = timeout or self.attempt_timeout
+        last_error: Optional[Exception] = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            received = False
+            try:
+                async with self._semaphore:
+                    async with self._client.stream(
+                        "POST", "/chat/completions", json=payload,
+                        timeout=httpx.Timeout(deadline, connect=min(5.0, deadline))
+                    ) as response:
+                        if response.status_code != 200:
+                            if response.status_code not in RETRYABLE_STATUS:
+                                raise LLMError(f"LLM returned status {response.status_code}")
+                            raise httpx.HTTPStatusError(
+                                f"LLM returned status {response.status_code}",
+                                request=response.request, response=response
+                            )
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                return
+                            try:
+                                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                            except (ValueError, KeyError, IndexError) as e:
+                                raise LLMError(f"Malformed stream chunk: {data[:80]!r}") from e
+                            if delta:
+                                received = True
+                                yield delta
+                        return
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                if received:
+                    raise LLMError(f"LLM stream interrupted: {e!r}") from e
+                last_error = e
+
+            if attempt < self.max_attempts:
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+        error_type = LLMTimeout if isinstance(last_error, httpx.TimeoutException) else LLMError
+        raise error_type(f"LLM stream failed after {self.max_attempts} attempts: {last_error!r}") from last_error
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given attempt number"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    async def warm(self, connections: int = 1) -> int:
+        """Open up to `connections` keep-alive connections before the first call; returns how many opened
+
+        Any HTTP answer leaves its connection in the pool, so the status is ignored.
+        """
+        async def connect() -> bool:
+            try:
+                await self._client.head("/models", timeout=min(5.0, self.attempt_timeout))
+            except httpx.HTTPError:
+                return False
+            return True
+
+        return sum(await asyncio.gather(*(connect() for _ in range(connections))))
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def client_settings_from_env() -> dict:
+    """Pool, deadline and retry settings shared by every configured LLM client"""
+    return {
+        "max_connections": int(os.getenv("LLM_MAX_CONNECTIONS", "32")),
+        "max_keepalive": int(os.getenv("LLM_MAX_KEEPALIVE", "16")),
+        "max_concurrency": int(os.getenv("LLM_MAX_CONCURRENCY", "16")),
+        "attempt_timeout": float(os.getenv("LLM_ATTEMPT_TIMEOUT", "10")),
+        "max_attempts": int(os.getenv("LLM_MAX_ATTEMPTS", "3")),
+    }
@@ -0,0 +1,126 @@
+# llm_json.py - INCREMENTAL PARSING OF JSON STREAMED FROM THE LLM
+import json
+import re
+from typing import List, Optional
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"\s*")
+
+
+class ArrayStreamParser:
+    """Pull completed items out of the JSON array under `key` as the text grows
+
+    Only items followed by a ',' or ']' are returned, so a number cut off at
+    the end of the buffer is never mistaken for a complete value.
+    """
+
+    def __init__(self, key: str):
+        self._start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._pos: Optional[int] = None
+        self.closed = False
+        self.items: List = []
+
+    def feed(self, text: str) -> list:
+        """Parse as far as `text` allows and return the items completed by this call"""
+        if self.closed:
+            return []
+        if self._pos is None:
+            match = self._start.search(text)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        new_items = []
+        while True:
+            pos = _whitespace.match(text, self._pos).end()
+            if pos >= len(text):
+                break
+            if text[pos] == "]":
+                self.closed = True
+                break
+            try:
+                item, end = _decoder.raw_decode(text, pos)
+            except ValueError:
+                break
+            end = _whitespace.match(text, end).end()
+            if end >= len(text) or text[end] not in ",]":
+                break
+            new_items.append(item)
+            self._pos = end + 1 if text[end] == "," else end
+        self.items.extend(new_items)
+        return new_items
+
+
+_fence = re.compile(r"```[a-zA-Z]*\s*\n?(.*?)(?:```|\Z)", re.DOTALL)
+_closers = {"{": "}", "[": "]"}
+
+
+def extract_json(text: str, max_open: int = 2) -> tuple:
+    """(value, repairs) for the first JSON object in LLM output
+
+    Tolerates markdown code fences, prose around the object and output cut
+    off mid-document (e.g. at max_tokens). A truncated document is cut back
+    to the last point where at most max_open containers are still open and
+    those are closed, so with the default of 2 every element kept in a
+    top-level array is complete. repairs names what had to be fixed
+    ("fence", "prose", "truncated"); raises ValueError if nothing parses.
+    """
+    repairs = []
+    fenced = _fence.search(text)
+    if fenced is not None and "{" in fenced.group(1):
+        text = fenced.group(1)
+        repairs.append("fence")
+
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("No JSON object in LLM output")
+    if text[:start].strip():
+        repairs.append("prose")
+
+    try:
+        value, end = _decoder.raw_decode(text, start)
+    except ValueError:
+        value = close_truncated(text, start, max_open)
+        repairs.append("truncated")
+    else:
+        if text[end:].strip():
+            repairs.append("prose")
+    return value, list(dict.fromkeys(repairs))
+
+
+def close_truncated(text: str, start: int = 0, max_open: int = 2):
+    """Parse the longest prefix of a cut-off JSON document that can be completed by closing brackets"""
+    stack = []
+    cuts = []  # (position, open containers) where the prefix ends on a complete value
+    in_string = escaped = False
+    for pos in range(start, len(text)):
+        char = text[pos]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _closers:
+            stack.append(_closers[char])
+            cuts.append((pos + 1, "".join(reversed(stack))))
+        elif char in "}]":
+            if not stack or stack.pop() != char:
+                break
+            if not stack:
+                break
+            cuts.append((pos + 1, "".join(reversed(stack))))
+        elif char == ",":
+            cuts.append((pos, "".join(reversed(stack))))
+
+    for pos, closing in reversed(cuts):
+        if len(closing) > max_open:
+            continue
+        try:
+            return json.loads(text[start:pos] + closing)
+        except ValueError:
+            continue
+    raise ValueError("Truncated JSON could not be repaired")
@@ -0,0 +1,278 @@
+# llm_router.py - MULTI-BACKEND LLM ROUTING WITH HEDGED REQUESTS
+import asyncio
+import json
+import os
+import random
+import time
+from typing import AsyncIterator, Callable, List, Optional
+
+from circuit_breaker import CircuitBreaker, breaker_from_env
+from llm_client import OPENROUTER_BASE_URL, AsyncLLMClient, LLMError, client_settings_from_env
+from metrics import llm_backend_calls, llm_backend_latency, llm_hedges
+
+DEFAULT_MODEL = "meta-llama/llama-3.1-8b-instruct"
+
+# Errors that make one backend's answer unusable without ending the request
+INVALID_RESPONSE = (LLMError, KeyError, IndexError, TypeError, ValueError)
+
+
+class Backend:
+    """One provider/model pair with its own client, health breaker and latency estimate"""
+
+    def __init__(self, name: str, client: AsyncLLMClient, model: str, weight: float = 1.0,
+                 breaker: Optional[CircuitBreaker] = None, smoothing: float = 0.2):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.weight = max(weight, 1e-6)
+        self.breaker = breaker or CircuitBreaker(deadline_ceiling=client.attempt_timeout)
+        self.smoothing = smoothing
+        self.latency: Optional[float] = None  # EWMA, seconds
+        self.calls = 0
+
+    def observe(self, seconds: float):
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+
+    def observe_failure(self, seconds: float):
+        """Count a failed call as at least a full attempt timeout, so a failing backend drops in the ranking"""
+        self.observe(max(seconds, self.client.attempt_timeout))
+
+    def healthy(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def score(self) -> float:
+        """Lower is better; unmeasured backends go first so each one gets an estimate"""
+        if self.latency is None:
+            return 0.0
+        return self.latency / self.weight
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "weight": self.weight,
+            "state": self.breaker.state,
+            "latency_ms": round(self.latency * 1000, 2) if self.latency is not None else None,
+            "calls": self.calls
+        }
+
+
+class LLMRouter:
+    """Drop-in for AsyncLLMClient that spreads calls over several backends
+
+    The primary is the healthy backend with the lowest latency per unit of
+    weight, with a small weighted-random exploration share so estimates for
+    the others stay fresh. If the primary has not answered within
+    hedge_after seconds, the next backend is raced against it and the
+    first valid response wins; the loser is cancelled. A backend that fails
+    hands over to the next one immediately.
+    """
+
+    def __init__(self, backends: List[Backend], hedge_after: float = 1.5, explore: float = 0.05,
+                 rng: Optional[random.Random] = None):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.hedge_after = hedge_after
+        self.explore = explore
+        self._rng = rng or random.Random()
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def attempt_timeout(self) -> float:
+        return max(backend.client.attempt_timeout for backend in self.backends)
+
+    def ranked(self) -> List[Backend]:
+        """Healthy backends, preferred first"""
+        ranked = sorted((b for b in self.backends if b.healthy()), key=Backend.score)
+        if len(ranked) > 1 and self._rng.random() < self.explore:
+            pick = self._rng.choices(ranked, weights=[b.weight for b in ranked])[0]
+            ranked.remove(pick)
+            ranked.insert(0, pick)
+        return ranked
+
+    async def chat(self, payload: dict, timeout: Optional[float] = None, parse: Optional[Callable] = None):
+        """First valid answer across backends
+
+        parse maps a completion to the value returned here; if it raises, that
+        backend's answer is treated as invalid and the others keep racing.
+        """
+        parse = parse or (lambda result: result)
+        candidates = self.ranked()
+        pending = {}
+        last_error: Optional[Exception] = None
+
+        def launch() -> Optional[Backend]:
+            while candidates:
+                backend = candidates.pop(0)
+                if backend.breaker.allow():
+                    pending[asyncio.ensure_future(self._call(backend, payload, timeout, parse))] = backend
+                    return backend
+            return None
+
+        primary = launch()
+        hedged = False
+        try:
+            while pending:
+                wait = self.hedge_after if candidates and not hedged and self.hedge_after > 0 else None
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = launch() is not None
+                    self.hedges += hedged
+                    continue
+                for task in done:
+                    backend = pending.pop(task)
+                    try:
+                        value = task.result()
+                    except INVALID_RESPONSE as e:
+                        last_error = e
+                        continue
+                    if hedged:
+                        won = backend is not primary
+                        self.hedge_wins += won
+                        llm_hedges.inc(str(won).lower())
+                    return value
+                if not pending:
+                    launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_error or LLMError("No healthy LLM backend")
+
+    async def _call(self, backend: Backend, payload: dict, timeout: Optional[float], parse: Callable):
+        backend.calls += 1
+        started = time.perf_counter()
+        try:
+            result = await backend.client.chat({**payload, "model": backend.model}, timeout=timeout)
+        except LLMError:
+            elapsed = time.perf_counter() - started
+            backend.breaker.record_failure(elapsed)
+            backend.observe_failure(elapsed)
+            llm_backend_calls.inc(backend.name, "error")
+            raise
+        except asyncio.CancelledError:
+            # Lost a hedge race: it took at least this long, which still informs the estimate
+            backend.breaker.release()
+            backend.observe(time.perf_counter() - started)
+            llm_backend_calls.inc(backend.name, "cancelled")
+            raise
+        except BaseException:
+            backend.breaker.release()
+            raise
+
+        elapsed = time.perf_counter() - started
+        backend.breaker.record_success(elapsed)
+        backend.observe(elapsed)
+        llm_backend_latency.observe(elapsed, backend.name)
+        try:
+            value = parse(result)
+        except INVALID_RESPONSE:
+            llm_backend_calls.inc(backend.name, "invalid")
+            raise
+        llm_backend_calls.inc(backend.name, "success")
+        return value
+
+    async def stream_chat(self, payload: dict, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream from the preferred backend, failing over while nothing has been yielded yet"""
+        last_error: Optional[Exception] = None
+        for backend in self.ranked():
+            if not backend.breaker.allow():
+                continue
+            backend.calls += 1
+            started = time.perf_counter()
+            received = False
+            try:
+                async for delta in backend.client.stream_chat({**payload, "model": backend.model}, timeout=timeout):
+                    received = True
+                    yield delta
+            except LLMError as e:
+                elapsed = time.perf_counter() - started
+                backend.breaker.record_failure(elapsed)
+                backend.observe_failure(elapsed)
+                llm_backend_calls.inc(backend.name, "error")
+                if received:
+                    raise
+                last_error = e
+                continue
+            except BaseException:
+                backend.breaker.release()
+                raise
+
+            elapsed = time.perf_counter() - started
+            backend.breaker.record_success(elapsed)
+            backend.observe(elapsed)
+            llm_backend_latency.observe(elapsed, backend.name)
+            llm_backend_calls.inc(backend.name, "success")
+            return
+
+        raise last_error or LLMError("No healthy LLM backend")
+
+    def stats(self) -> dict:
+        return {
+            "backends": [backend.stats() for backend in self.backends],
+            "hedge_after": self.hedge_after,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
+
+    async def warm(self, connections: int = 1) -> dict:
+        """Open keep-alive connections to every backend concurrently; {backend name: connections opened}"""
+        opened = await asyncio.gather(*(backend.client.warm(connections) for backend in self.backends))
+        return {backend.name: count for backend, count in zip(self.backends, opened)}
+
+    async def aclose(self):
+        for backend in self.backends:
+            await backend.client.aclose()
+
+
+def load_backend_specs() -> List[dict]:
+    """LLM_BACKENDS as a JSON list (inline or a file path), else the single OpenRouter backend"""
+    raw = os.getenv("LLM_BACKENDS", "").strip()
+    if not raw:
+        return [{"name": "openrouter", "model": os.getenv("LLM_MODEL", DEFAULT_MODEL)}]
+    if not raw.startswith("["):
+        with open(raw) as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+def router_from_env() -> Optional[LLMRouter]:
+    """Build a router from environment settings, or None when no backend has an API key
+
+    Each backend spec takes name, model, weight, base_url and api_key_env
+    (default OPENROUTER_API_KEY); the client pool and retry settings are shared.
+    With more than one backend each client makes a single attempt, so a failure
+    fails over to the next backend instead of retrying the same one.
+    """
+    settings = client_settings_from_env()
+    specs = [(i, spec, os.getenv(spec.get("api_key_env", "OPENROUTER_API_KEY")))
+             for i, spec in enumerate(load_backend_specs())]
+    specs = [(i, spec, api_key) for i, spec, api_key in specs if api_key]
+    if len(specs) > 1:
+        settings["max_attempts"] = 1
+    backends = []
+    for i, spec, api_key in specs:
+        client = AsyncLLMClient(
+            api_key=api_key,
+            base_url=spec.get("base_url") or os.getenv("OPENROUTER_BASE_URL", OPENROUTER_BASE_URL),
+            **settings
+        )
+        backends.append(Backend(
+            name=spec.get("name", f"backend{i}"),
+            client=client,
+            model=spec.get("model", DEFAULT_MODEL),
+            weight=float(spec.get("weight", 1)),
+            breaker=breaker_from_env(client.attempt_timeout)
+        ))
+    if not backends:
+        return None
+    return LLMRouter(
+        backends,
+        hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "1.5")),
+        explore=float(os.getenv("LLM_ROUTER_EXPLORE", "0.05"))
+    )
@@ -1,18 +1,147 @@
 # main.py - INTELLIGENT LEARNING ROADMAP GENERATOR WITH REAL PROJECTS
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
 from typing import List, Optional
-import os, requests, json, uuid
+from contextlib import asynccontextmanager
+import os, json, uuid, time, asyncio, logging
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from llm_client import LLMError, LLMTimeout
+from llm_router import router_from_env
+from cache import cache_from_env, cache_key
+from singleflight import SingleFlight
+from circuit_breaker import breaker_from_env
+from storage import store_from_env
+from jobs import QueueFull, job_body, jobs_from_env
+from progress import is_marked, mark, progress_stats, progress_view, weeks_in
+from llm_json import ArrayStreamParser, extract_json
+from batch import BatchMetrics
+from topic_index import TOPIC_KEYWORDS, TopicIndex
+from catalog import CatalogSnapshot, catalog_from_env
+from templates import FastJSONResponse, TemplateCache, dumps, fields, join_array, join_object
+from metrics import Gauge, fallbacks, llm_repairs, stage_latency, http_latency, http_requests, llm_outcomes, registry, server_timing, stage, start_spans
 
 load_dotenv()
 
+logger = logging.getLogger("roadmap")
+
+# The store, response cache and job queue touch disk, so they are opened in lifespan (open_state), not at import
+store = None
+response_cache = None
+generation_jobs = None
+
+# Identical concurrent generations share one in-flight LLM call
+inflight_generations = SingleFlight()
+
+# Fails fast to templates while OpenRouter is unhealthy; also sets the adaptive per-call deadline
+llm_breaker = breaker_from_env(float(os.getenv("LLM_ATTEMPT_TIMEOUT", "10")))
+
+# Compiled once at startup; detect_topic is a hash lookup per word n-gram
+topic_index = TopicIndex(TOPIC_KEYWORDS)
+
+batch_metrics = BatchMetrics()
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+
+# Shared LLM router - one keep-alive connection pool per backend per process
+llm_client = None
+
+def get_llm_client():
+    """Return the shared LLM router, creating it on first use"""
+    global llm_client
+    if llm_client is None:
+        llm_client = router_from_env()
+    return llm_client
+
+async def compact_store_periodically():
+    """Drop roadmaps older than ROADMAP_TTL_DAYS, once per ROADMAP_COMPACT_INTERVAL seconds"""
+    ttl = timedelta(days=float(os.getenv("ROADMAP_TTL_DAYS", "90")))
+    interval = float(os.getenv("ROADMAP_COMPACT_INTERVAL", "3600"))
+    while True:
+        try:
+            await asyncio.to_thread(store.compact, ttl)
+        except Exception:
+            # e.g. "database is locked" past the busy timeout; try again next interval
+            logger.exception("Roadmap store compaction failed")
+        await asyncio.sleep(interval)
+
+async def reload_catalog_periodically():
+    """Pick up catalog.json edits without a restart (every CATALOG_RELOAD_INTERVAL seconds)"""
+    interval = float(os.getenv("CATALOG_RELOAD_INTERVAL", "5"))
+    while interval > 0:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(catalog.reload_if_changed)
+        except (OSError, ValueError, KeyError) as e:
+            # Keep serving the last good snapshot if the file is mid-write or invalid
+            logger.warning("Catalog reload failed: %s", e)
+
+# Reported by /readyz: starting -> ready once the catalog, cache and LLM connections are warm -> stopping
+startup = {"status": "starting", "startup_ms": None, "cache_entries": None, "llm_connections": None}
+
+def load_catalog():
+    """Read and index the catalog, then compile every topic's JSON fragments"""
+    roadmap_templates.warm(catalog.load(), topic_index.topics + [topic_index.default])
+
+def open_state() -> int:
+    """Open the store, response cache and job records; returns how many cache entries were warmed from disk"""
+    global store, response_cache, generation_jobs
+    store = store_from_env()
+    response_cache = cache_from_env()
+    generation_jobs = jobs_from_env(run_generation_job)
+    return response_cache.warm()
+
+async def warm_llm_pool():
+    """Open keep-alive connections to each LLM backend, giving up after STARTUP_WARMUP_TIMEOUT seconds"""
+    client = get_llm_client()
+    if client is None:
+        return None
+    try:
+        return await asyncio.wait_for(client.warm(int(os.getenv("LLM_WARM_CONNECTIONS", "2"))),
+                                      float(os.getenv("STARTUP_WARMUP_TIMEOUT", "5")))
+    except asyncio.TimeoutError:
+        logger.warning("LLM connection warmup timed out; connections will open on first use")
+        return None
+
+async def finish_startup(started: float):
+    startup["llm_connections"] = await warm_llm_pool()
+    startup["startup_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    startup["status"] = "ready"
+    logger.info("Ready in %.1f ms", startup["startup_ms"])
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    # Files and databases are opened here, concurrently and off the event loop, before uvicorn accepts connections
+    _, startup["cache_entries"] = await asyncio.gather(
+        asyncio.to_thread(load_catalog),
+        asyncio.to_thread(open_state)
+    )
+    generation_jobs.start()
+    background = [
+        asyncio.create_task(compact_store_periodically()),
+        asyncio.create_task(reload_catalog_periodically()),
+        asyncio.create_task(finish_startup(started))
+    ]
+    yield
+    startup["status"] = "stopping"
+    for task in background:
+        task.cancel()
+    await generation_jobs.stop()
+    await asyncio.to_thread(response_cache.save)
+    if llm_client is not None:
+        await llm_client.aclose()
+
 app = FastAPI(
     title="Intelligent Learning Roadmap Generator Pro",
     description="AI-powered learning path generator with real projects and resources",
-    version="3.0"
+    version="3.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 app.add_middleware(
@@ -23,6 +152,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request stage timings in a Server-Timing header: always, or when asked for
+TIMING_HEADERS = os.getenv("ROADMAP_TIMING_HEADERS") == "1"
+
+class RequestMetricsMiddleware:
+    """Count and time every request; add Server-Timing for X-Debug-Timing: 1 or ?debug=timing
+    
+    Plain ASGI rather than BaseHTTPMiddleware: no extra task and memory stream per
+    request, and the clock stops at the last body chunk, so streamed responses are
+    timed to the end rather than to their headers. Server-Timing goes out with the
+    headers, so its total is time to first byte.
+    """
+    
+    def __init__(self, app, timing_headers: bool = False):
+        self.app = app
+        self.timing_headers = timing_headers
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        timed = (self.timing_headers or Headers(scope=scope).get("x-debug-timing") == "1"
+                 or QueryParams(scope["query_string"]).get("debug") == "timing")
+        spans = start_spans() if timed else None
+        started = time.perf_counter()
+        status = 500
+        finished = None
+        
+        async def send_timed(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if spans is not None:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing(spans, time.perf_counter() - started))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+        
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            elapsed = (finished or time.perf_counter()) - started
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            http_requests.inc(scope["method"], path, str(status))
+            http_latency.observe(elapsed, scope["method"], path)
+
+app.add_middleware(RequestMetricsMiddleware, timing_headers=TIMING_HEADERS)
+
+# Plans run INITIAL_WEEKS..MAX_PLAN_WEEKS weeks. Only the first INITIAL_WEEKS are detailed when the
+# roadmap is created; later weeks are generated WEEK_PAGE_SIZE at a time by /roadmap/{id}/weeks
+INITIAL_WEEKS = 4
+MAX_PLAN_WEEKS = 52
+WEEK_PAGE_SIZE = 4
+
 class EnhancedUserInput(BaseModel):
     goal: str
     proficiency: str
@@ -30,6 +214,7 @@ class EnhancedUserInput(BaseModel):
     learning_style: List[str]
     specific_interests: Optional[str] = None
     challenges: Optional[str] = None
+    weeks: int = Field(INITIAL_WEEKS, ge=INITIAL_WEEKS, le=MAX_PLAN_WEEKS)
 
 class ProgressUpdate(BaseModel):
     roadmap_id: str
@@ -37,82 +222,57 @@ class ProgressUpdate(BaseModel):
     project_done: bool
     notes: Optional[str] = None
 
-progress_db = {}
-
-# REAL PROJECT TEMPLATES WITH GITHUB LINKS
-REAL_PROJECTS = {
-    "python": [
-        {
-            "title": "Build a Personal Finance Tracker",
-            "description": "Create a command-line app to track expenses and income",
-            "github_template": "https://github.com/trekhleb/learn-python",
-            "skills": ["File I/O", "Data Structures", "Basic Algorithms"],
-            "demo_url": "https://replit.com/@python/finance-tracker"
-        },
-        {
-            "title": "Web Scraper for News Articles",
-            "description": "Scrape news websites and save articles to a database",
-            "github_template": "https://github.com/scrapinghub/python-web-scraper",
-            "skills": ["Web Scraping", "HTML Parsing", "Database"],
-            "demo_url": "https://replit.com/@python/web-scraper"
-        }
-    ],
-    "web": [
-        {
-            "title": "Todo List Application",
-            "description": "Build a full-stack todo app with user authentication",
-            "github_template": "https://github.com/spring-projects/spring-petclinic",
-            "skills": ["HTML/CSS", "JavaScript", "Backend API"],
-            "demo_url": "https://todomvc.com"
-        },
-        {
-            "title": "Weather Dashboard",
-            "description": "Create a dashboard showing weather from multiple cities",
-            "github_template": "https://github.com/public-apis/public-apis",
-            "skills": ["API Integration", "Frontend", "Data Visualization"],
-            "demo_url": "https://openweathermap.org/api"
-        }
-    ],
-    "data": [
-        {
-            "title": "COVID-19 Data Analysis",
-            "description": "Analyze COVID-19 trends and create visualizations",
-            "github_template": "https://github.com/owid/covid-19-data",
-            "skills": ["Data Analysis", "Visualization", "Pandas"],
-            "demo_url": "https://ourworldindata.org/coronavirus"
-        },
-        {
-            "title": "Customer Segmentation",
-            "description": "Use clustering algorithms to segment customers",
-            "github_template": "https://github.com/scikit-learn/scikit-learn",
-            "skills": ["Machine Learning", "Clustering", "Analysis"],
-            "demo_url": "https://scikit-learn.org/stable/auto_examples/cluster/plot_kmeans_digits.html"
-        }
-    ]
-}
+class ProgressEvent(ProgressUpdate):
+    # Retries carrying the same key (per roadmap) are applied once
+    idempotency_key: Optional[str] = None
 
-# REAL RESOURCES THAT WORK
-REAL_RESOURCES = {
-    "python": [
-        {"type": "Video", "title": "Python for Beginners - Full Course", "url": "https://www.youtube.com/watch?v=_uQrJ0TkZlc", "platform": "YouTube", "channel": "Programming with Mosh"},
-        {"type": "Course", "title": "Python for Everybody", "url": "https://www.coursera.org/specializations/python", "platform": "Coursera", "free": True},
-        {"type": "Article", "title": "Python Official Tutorial", "url": "https://docs.python.org/3/tutorial/", "source": "Python.org"},
-        {"type": "Project", "title": "100 Days of Code: Python", "url": "https://github.com/100DaysOfCode-Python", "platform": "GitHub"}
-    ],
-    "web": [
-        {"type": "Video", "title": "HTML & CSS Full Course", "url": "https://www.youtube.com/watch?v=mU6anWqZJcc", "platform": "YouTube", "channel": "freeCodeCamp"},
-        {"type": "Course", "title": "The Odin Project", "url": "https://www.theodinproject.com/", "platform": "Odin Project", "free": True},
-        {"type": "Article", "title": "MDN Web Docs", "url": "https://developer.mozilla.org/en-US/", "source": "Mozilla"},
-        {"type": "Project", "title": "Frontend Mentor Challenges", "url": "https://www.frontendmentor.io/", "platform": "Frontend Mentor"}
-    ],
-    "data": [
-        {"type": "Video", "title": "Data Science Full Course", "url": "https://www.youtube.com/watch?v=ua-CiDNNj30", "platform": "YouTube", "channel": "edureka!"},
-        {"type": "Course", "title": "Data Science with Python", "url": "https://www.kaggle.com/learn/python", "platform": "Kaggle", "free": True},
-        {"type": "Article", "title": "Towards Data Science", "url": "https://towardsdatascience.com/", "source": "Medium"},
-        {"type": "Project", "title": "Kaggle Competitions", "url": "https://www.kaggle.com/competitions", "platform": "Kaggle"}
-    ]
+class ProgressBatchRequest(BaseModel):
+    events: List[ProgressEvent]
+
+class BatchRoadmapRequest(BaseModel):
+    inputs: List[EnhancedUserInput]
+    concurrency: Optional[int] = None
+    stream: bool = False
+
+class LLMStructure(BaseModel):
+    """Schema for structures returned by the LLM; anything missing is filled from the template"""
+    title: Optional[str] = None
+    overview: Optional[str] = None
+    weekly_themes: List[str] = []
+    weekly_focus: List[str] = []
+    weekly_objectives: List[List[str]] = []
+
+    @field_validator("weekly_objectives", mode="before")
+    @classmethod
+    def wrap_single_objectives(cls, value):
+        # Models sometimes answer a week's objectives with one string instead of a list
+        if isinstance(value, list):
+            return [[item] if isinstance(item, str) else item for item in value]
+        return value
+
+# REAL PROJECTS AND RESOURCES - loaded from catalog.json, indexed by topic, type and skill
+catalog = catalog_from_env()
+
+ROADMAP_PREREQUISITES = {
+    "knowledge": ["Basic computer skills", "Internet access"],
+    "tools": ["Computer", "Code editor", "Git"]
 }
 
+ROADMAP_SUCCESS_TIPS = [
+    "Code every day, even for 30 minutes",
+    "Build projects that interest you",
+    "Join communities for support",
+    "Document your learning journey",
+    "Teach others what you learn"
+]
+
+ROADMAP_COMMUNITY_RECOMMENDATIONS = [
+    "Discord: Learn Together",
+    "Reddit: r/learnprogramming", 
+    "GitHub: Open Source",
+    "Dev.to Community"
+]
+
 @app.get("/")
 def root():
     return {
@@ -122,58 +282,265 @@ def root():
         "features": ["Real projects", "Working resources", "Progress tracking", "Visual timeline"]
     }
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and answering"""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 503 until startup warmup has finished, and again once shutdown begins"""
+    body = {**startup, "catalog_loaded": catalog.loaded, "circuit": llm_breaker.state}
+    return JSONResponse(status_code=200 if startup["status"] == "ready" else 503, content=body)
+
 @app.post("/generate-roadmap")
-def generate_roadmap(user_input: EnhancedUserInput):
-    """Generate roadmap with REAL working resources and projects"""
+async def generate_roadmap(user_input: EnhancedUserInput, async_: bool = Query(False, alias="async"),
+                           priority: int = 0, callback_url: Optional[str] = None):
+    """Generate roadmap with REAL working resources and projects
+    
+    With ?async=true the roadmap is generated in the background: the response is a
+    202 with a job id to poll at /jobs/{job_id}, and the finished job is also POSTed
+    to callback_url when one is given. A full queue answers 429 with Retry-After.
+    """
+    
+    if not async_:
+        return Response(await generate_roadmap_json(user_input), media_type="application/json")
+    
+    if callback_url is not None:
+        error = await generation_jobs.check_callback(callback_url)
+        if error is not None:
+            raise HTTPException(status_code=422, detail=error)
+    priority = max(0, min(priority, JOB_PRIORITY_MAX))
+    try:
+        job = await generation_jobs.submit(user_input.model_dump(), priority, callback_url)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    status_url = f"/jobs/{job['job_id']}"
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job["job_id"], "status": job["status"], "priority": priority, "status_url": status_url},
+        headers={"Location": status_url}
+    )
+
+async def generate_roadmap_json(user_input: EnhancedUserInput) -> bytes:
+    """The roadmap document for /generate-roadmap, falling back to templates on any failure"""
     
     # Detect topic for relevant resources
     topic = detect_topic(user_input.goal.lower())
     
     try:
         # Get AI-generated structure
-        roadmap_structure = get_ai_roadmap_structure(user_input)
-        
-        # Enhance with real resources and projects
-        roadmap = enhance_with_real_content(roadmap_structure, topic, user_input)
+        roadmap_structure = await get_ai_roadmap_structure(user_input)
         
-        # Add metadata
-        roadmap["roadmap_id"] = str(uuid.uuid4())[:8]
-        roadmap["generated_at"] = datetime.now().isoformat()
-        roadmap["topic"] = topic
+        # Static parts are pre-serialized per topic; only request fields are encoded here
+        return await finalize_roadmap_json(roadmap_structure, topic, user_input)
         
-        # Store
-        progress_db[roadmap["roadmap_id"]] = {
-            "roadmap": roadmap,
-            "progress": {"completed_weeks": [], "completed_projects": []},
-            "created_at": roadmap["generated_at"]
-        }
+    except Exception:
+        logger.exception("Roadmap generation failed, serving fallback roadmap")
+        fallbacks.inc("exception")
+        return render_fallback_json(user_input, topic)
+
+async def run_generation_job(payload: dict) -> bytes:
+    return await generate_roadmap_json(EnhancedUserInput(**payload))
+
+# Async generations (generation_jobs): bounded in-process priority queue; job records in SQLite so any
+# worker can answer /jobs/{id}
+JOB_PRIORITY_MAX = 9
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of an async generation; includes the roadmap once the job has succeeded"""
+    job = await asyncio.to_thread(generation_jobs.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Response(job_body(job), media_type="application/json")
+
+async def finalize_roadmap(structure: dict, topic: str, user_input: EnhancedUserInput,
+                           roadmap_id: Optional[str] = None, content: Optional[CatalogSnapshot] = None) -> dict:
+    """Enhance a structure with real content, add metadata and store it"""
+    
+    # Enhance with real resources and projects
+    roadmap = enhance_with_real_content(structure, topic, user_input, content)
+    
+    # Add metadata
+    roadmap["roadmap_id"] = roadmap_id or str(uuid.uuid4())[:8]
+    roadmap["generated_at"] = datetime.now().isoformat()
+    roadmap["topic"] = topic
+    
+    # Store - off the event loop, since a SQLite write can wait on another writer's lock
+    with stage("store"):
+        await asyncio.to_thread(store.save_roadmap, roadmap["roadmap_id"], roadmap, roadmap["generated_at"],
+                                roadmap_plan(structure, topic, user_input))
+    
+    return roadmap
+
+async def finalize_roadmap_json(structure: dict, topic: str, user_input: EnhancedUserInput) -> bytes:
+    """Same roadmap as finalize_roadmap, assembled from cached JSON fragments"""
+    content = catalog.current
+    roadmap_id = str(uuid.uuid4())[:8]
+    generated_at = datetime.now().isoformat()
+    
+    with stage("assemble"):
+        body = render_roadmap_json(structure, topic, roadmap_id, generated_at, content, user_input.weeks)
+    with stage("store"):
+        await asyncio.to_thread(store.save_roadmap_json, roadmap_id, body, user_input.weeks, generated_at,
+                                roadmap_plan(structure, topic, user_input))
+    return body
+
+def roadmap_plan(structure: dict, topic: str, user_input: EnhancedUserInput) -> dict:
+    """What /roadmap/{id}/weeks needs to generate the weeks after the initial ones"""
+    return {
+        "input": user_input.model_dump(),
+        "topic": topic,
+        "title": structure["title"],
+        "total_weeks": user_input.weeks,
+        "themes": [theme for theme, _, _ in structure_weeks(structure)]
+    }
+
+@app.post("/generate-roadmaps/batch")
+async def generate_roadmaps_batch(request: BatchRoadmapRequest):
+    """Generate many roadmaps at once; equivalent inputs share one LLM call"""
+    if len(request.inputs) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_ITEMS} inputs per batch")
+    concurrency = max(1, min(request.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+    
+    results = batch_results(request.inputs, concurrency)
+    if request.stream:
+        return StreamingResponse(
+            (item + b"\n" async for item in results),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    items = [item async for item in results]
+    summary = items.pop()
+    # summary is {"summary": {...}}; drop its braces to splice it in as a field
+    return Response(join_object(b'"results":' + join_array(items), summary[1:-1]), media_type="application/json")
+
+async def batch_results(inputs: List[EnhancedUserInput], concurrency: int):
+    """Yield per-item results (JSON bytes) in input order, then a summary line"""
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch_structure(user_input: EnhancedUserInput) -> dict:
+        async with semaphore:
+            return await get_ai_roadmap_structure(user_input)
+    
+    # One structure task per distinct normalized input
+    structure_tasks = {}
+    for user_input in inputs:
+        key = structure_cache_key(user_input)
+        if key not in structure_tasks:
+            structure_tasks[key] = asyncio.ensure_future(fetch_structure(user_input))
+    
+    errors = 0
+    try:
+        for index, user_input in enumerate(inputs):
+            topic = detect_topic(user_input.goal.lower())
+            try:
+                structure = await structure_tasks[structure_cache_key(user_input)]
+                roadmap = await finalize_roadmap_json(structure, topic, user_input)
+                yield join_object(b'"index":%d,"status":"ok"' % index, b'"roadmap":' + roadmap)
+            except Exception as e:
+                errors += 1
+                yield dumps({"index": index, "status": "error", "error": str(e)})
+    finally:
+        for task in structure_tasks.values():
+            task.cancel()
+    
+    seconds = time.perf_counter() - started
+    batch_metrics.record(len(inputs), len(structure_tasks), errors, concurrency, seconds)
+    yield dumps({"summary": {
+        "items": len(inputs),
+        "unique_items": len(structure_tasks),
+        "errors": errors,
+        "concurrency": concurrency,
+        "seconds": round(seconds, 4)
+    }})
+
+@app.get("/generate-roadmaps/batch/metrics")
+def get_batch_metrics():
+    """Batch throughput, overall and per concurrency level"""
+    return batch_metrics.snapshot()
+
+@app.post("/generate-roadmap/stream")
+async def generate_roadmap_stream(user_input: EnhancedUserInput, format: str = "ndjson"):
+    """Stream the roadmap week by week as NDJSON (default) or server-sent events"""
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    events = stream_roadmap_events(user_input)
+    if format == "sse":
+        body = (f"event: {e['event']}\ndata: {json.dumps(e)}\n\n" async for e in events)
+        media_type = "text/event-stream"
+    else:
+        body = (json.dumps(e) + "\n" async for e in events)
+        media_type = "application/x-ndjson"
+    
+    return StreamingResponse(body, media_type=media_type, headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def stream_roadmap_events(user_input: EnhancedUserInput):
+    """start -> one week event per completed week -> complete (with the full stored roadmap)"""
+    topic = detect_topic(user_input.goal.lower())
+    roadmap_id = str(uuid.uuid4())[:8]
+    yield {"event": "start", "roadmap_id": roadmap_id, "topic": topic}
+    
+    content = catalog.current
+    
+    try:
+        sent = 0
+        structure = None
+        async for kind, value in stream_ai_structure(user_input):
+            if kind == "week":
+                yield {"event": "week", "week": build_week(sent, *value, content, topic)}
+                sent += 1
+            else:
+                structure = value
         
-        return roadmap
+        roadmap = await finalize_roadmap(structure, topic, user_input, roadmap_id, content)
         
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        return create_fallback_roadmap(user_input, topic)
+    except Exception:
+        logger.exception("Streamed roadmap generation failed, serving fallback roadmap")
+        fallbacks.inc("exception")
+        roadmap = create_fallback_roadmap(user_input, topic)
+        roadmap["roadmap_id"] = roadmap_id
+    
+    yield {"event": "complete", "roadmap": roadmap}
 
 def detect_topic(goal: str) -> str:
     """Detect the main topic from user goal"""
-    goal_lower = goal.lower()
-    if any(word in goal_lower for word in ["python", "programming", "coding", "software"]):
-        return "python"
-    elif any(word in goal_lower for word in ["web", "frontend", "backend", "fullstack", "html", "css", "javascript"]):
-        return "web"
-    elif any(word in goal_lower for word in ["data", "machine learning", "ai", "analysis", "visualization"]):
-        return "data"
-    else:
-        return "general"
+    return topic_index.classify(goal)
 
-def get_ai_roadmap_structure(user_input: EnhancedUserInput) -> dict:
+async def get_ai_roadmap_structure(user_input: EnhancedUserInput) -> dict:
     """Get basic roadmap structure from AI"""
+    structure, _ = await get_structure(
+        structure_cache_key(user_input),
+        lambda: llm_payload(user_input, STRUCTURE_PROMPT),
+        lambda: create_basic_structure(user_input)
+    )
+    return structure
+
+async def get_structure(key: str, payload, fallback) -> tuple:
+    """(structure, complete): cached structure for key, else one shared LLM call, else fallback()
     
-    api_key = os.getenv("OPENROUTER_API_KEY")
-    if not api_key:
-        return create_basic_structure(user_input)
+    complete is False when any week came from the template, i.e. whenever the
+    structure was not (and will not be) cached.
+    """
+    
+    client = get_llm_client()
+    if client is None:
+        fallbacks.inc("no_api_key")
+        return fallback(), False
     
-    system_prompt = """Return ONLY JSON. Structure:
+    with stage("cache_lookup"):
+        cached = await response_cache.aget(key)
+    if cached is not None:
+        return cached, True
+    
+    return await inflight_generations.do(key, lambda: fetch_ai_structure(client, payload(), key, fallback))
+
+STRUCTURE_PROMPT = """Return ONLY JSON. Structure:
     {
         "title": "Title",
         "overview": "Overview",
@@ -181,137 +548,415 @@ def get_ai_roadmap_structure(user_input: EnhancedUserInput) -> dict:
         "weekly_focus": ["Focus 1", "Focus 2", "Focus 3", "Focus 4"],
         "weekly_objectives": [["Obj1", "Obj2"], ["Obj3", "Obj4"], ["Obj5", "Obj6"], ["Obj7", "Obj8"]]
     }"""
-    
+
+# Week-major layout for streaming, so each week is complete as soon as its object closes
+STREAMING_STRUCTURE_PROMPT = """Return ONLY JSON. Structure:
+    {
+        "title": "Title",
+        "overview": "Overview",
+        "weeks": [
+            {"theme": "Theme 1", "focus": "Focus 1", "objectives": ["Obj1", "Obj2"]},
+            {"theme": "Theme 2", "focus": "Focus 2", "objectives": ["Obj3", "Obj4"]},
+            {"theme": "Theme 3", "focus": "Focus 3", "objectives": ["Obj5", "Obj6"]},
+            {"theme": "Theme 4", "focus": "Focus 4", "objectives": ["Obj7", "Obj8"]}
+        ]
+    }"""
+
+# Later weeks of long plans, one page per call
+WEEKS_PROMPT = """Return ONLY JSON. Structure:
+    {
+        "weekly_themes": ["Theme 1", "Theme 2"],
+        "weekly_focus": ["Focus 1", "Focus 2"],
+        "weekly_objectives": [["Obj1", "Obj2"], ["Obj3", "Obj4"]]
+    }"""
+
+def llm_payload(user_input: EnhancedUserInput, system_prompt: str) -> dict:
+    """Chat completion request body for a roadmap structure"""
     user_prompt = f"""
-    Create a {len(user_input.learning_style)}-week learning roadmap for:
+    Create a {user_input.weeks}-week learning roadmap for:
     Goal: {user_input.goal}
     Level: {user_input.proficiency}
     Time: {user_input.time_commitment}
     Styles: {', '.join(user_input.learning_style)}
     
+    Detail only weeks 1-{INITIAL_WEEKS}; later weeks are planned separately.
     Return only the JSON structure above.
     """
+    return chat_request(system_prompt, user_prompt)
+
+def week_page_payload(plan: dict, first: int, last: int) -> dict:
+    """Chat completion request body for weeks first..last of a stored plan"""
+    user_input = plan["input"]
+    earlier = "\n    ".join(f"Week {i + 1}: {theme}" for i, theme in enumerate(plan["themes"]))
+    user_prompt = f"""
+    Continue the {plan["total_weeks"]}-week learning roadmap "{plan["title"]}" for:
+    Goal: {user_input["goal"]}
+    Level: {user_input["proficiency"]}
+    Time: {user_input["time_commitment"]}
+    
+    It starts with:
+    {earlier}
+    
+    Return weeks {first}-{last} ({last - first + 1} weeks), building on the earlier weeks.
+    Return only the JSON structure above.
+    """
+    return chat_request(WEEKS_PROMPT, user_prompt)
+
+def chat_request(system_prompt: str, user_prompt: str) -> dict:
+    # The router fills in "model" for whichever backend serves the call
+    return {
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0.3,
+        "max_tokens": 1000,
+        "response_format": {"type": "json_object"}
+    }
+
+async def fetch_ai_structure(client, payload: dict, key: str, fallback) -> tuple:
+    """Call the LLM for a roadmap structure and cache the result; (structure, complete) as in get_structure"""
+    
+    if not llm_breaker.allow():
+        fallbacks.inc("circuit_open")
+        return fallback(), False
     
     try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "meta-llama/llama-3.1-8b-instruct",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.3,
-                "max_tokens": 1000,
-                "response_format": {"type": "json_object"}
-            },
-            timeout=30
-        )
+        started = time.perf_counter()
+        with stage("llm_call"):
+            structure, usage = await call_llm(client, payload, parse_structure_response)
+    
+    except (LLMError, KeyError, IndexError, TypeError, ValueError) as e:
+        record_llm_failure(e)
+        return fallback(), False
+    
+    llm_outcomes.inc("success")
+    if fill_from_template(structure, fallback()):
+        # Partial answers are served but not cached, so the next request asks again
+        return structure, False
+    await response_cache.aset(key, structure, time.perf_counter() - started, usage.get("total_tokens", 0))
+    return structure, True
+
+def parse_structure_response(result: dict) -> tuple:
+    """(structure, usage) from a chat completion; raises if no complete week can be salvaged
+    
+    The content may be fenced, wrapped in prose or cut off at max_tokens. Weeks are
+    kept only while theme, focus and objectives are all present, so the three lists
+    come back the same length; repairs are counted in roadmap_llm_repairs_total.
+    """
+    with stage("parse"):
+        data, repairs = extract_json(result["choices"][0]["message"]["content"])
+        structure = LLMStructure.model_validate(data).model_dump()
+        lengths = [len(structure[field]) for field in ("weekly_themes", "weekly_focus", "weekly_objectives")]
+        count = min(lengths)
+        if count == 0:
+            raise ValueError(f"No complete weeks in LLM output (lengths {lengths})")
+        if max(lengths) != count:
+            repairs.append("length_mismatch")
+            for field in ("weekly_themes", "weekly_focus", "weekly_objectives"):
+                del structure[field][count:]
+    
+    for repair in repairs:
+        llm_repairs.inc(repair)
+    if repairs:
+        logger.info("Repaired LLM output (%s): kept %d weeks from lengths %s", ", ".join(repairs), count, lengths)
+    return structure, result.get("usage") or {}
+
+def streamed_week(item) -> Optional[tuple]:
+    """(theme, focus, objectives) for one streamed week checked against LLMStructure, or None if it does not fit"""
+    if not isinstance(item, dict):
+        return None
+    try:
+        week = LLMStructure.model_validate({
+            "weekly_themes": [item.get("theme")],
+            "weekly_focus": [item.get("focus")],
+            "weekly_objectives": [item.get("objectives")]
+        })
+    except ValueError:
+        return None
+    return week.weekly_themes[0], week.weekly_focus[0], week.weekly_objectives[0]
+
+def fill_from_template(structure: dict, template: dict) -> int:
+    """Complete a salvaged structure in place from the template; returns how many weeks were added"""
+    for field in ("title", "overview"):
+        if structure.get(field) is None and field in template:
+            structure[field] = template[field]
+    count = len(structure["weekly_themes"])
+    for field in ("weekly_themes", "weekly_focus", "weekly_objectives"):
+        structure[field].extend(template[field][count:])
+    filled = max(0, len(template["weekly_themes"]) - count)
+    if filled:
+        llm_repairs.inc("template_weeks", amount=filled)
+        logger.warning("LLM structure salvaged %d of %d weeks; the rest come from the template",
+                       count, len(template["weekly_themes"]))
+    return filled
+
+async def call_llm(client, payload: dict, parse):
+    """client.chat with the breaker's adaptive deadline, recording the outcome on the breaker"""
+    started = time.perf_counter()
+    try:
+        result = await client.chat(payload, timeout=llm_breaker.deadline(), parse=parse)
+    except LLMError:
+        llm_breaker.record_failure(time.perf_counter() - started)
+        raise
+    except (KeyError, IndexError, TypeError, ValueError):
+        # Malformed output still means the upstream answered
+        llm_breaker.record_success(time.perf_counter() - started)
+        raise
+    except BaseException:
+        llm_breaker.release()
+        raise
+    llm_breaker.record_success(time.perf_counter() - started)
+    return result
+
+def record_llm_failure(error: Exception):
+    """Count a failed LLM call by outcome (timeout, error or parse_failure) and log it"""
+    if isinstance(error, LLMTimeout):
+        outcome = "timeout"
+    elif isinstance(error, LLMError):
+        outcome = "error"
+    else:
+        outcome = "parse_failure"
+    llm_outcomes.inc(outcome)
+    fallbacks.inc(f"llm_{outcome}")
+    logger.warning("LLM %s, falling back to the basic structure: %s", outcome, error)
+
+async def stream_ai_structure(user_input: EnhancedUserInput):
+    """Yield ("week", (theme, focus, objectives)) as weeks complete, then ("structure", structure)"""
+    
+    client = get_llm_client()
+    structure = None
+    use_llm = False
+    if client is None:
+        fallbacks.inc("no_api_key")
+    else:
+        key = structure_cache_key(user_input)
+        with stage("cache_lookup"):
+            structure = await response_cache.aget(key)
+        if structure is None:
+            use_llm = llm_breaker.allow()
+            if not use_llm:
+                fallbacks.inc("circuit_open")
+    
+    if not use_llm:
+        structure = structure or create_basic_structure(user_input)
+        for week in structure_weeks(structure):
+            yield "week", week
+        yield "structure", structure
+        return
+    
+    parser = ArrayStreamParser("weeks")
+    text = ""
+    weeks = []
+    # A week that fails the schema ends the salvage there, as if the stream had been cut off
+    complete = True
+    failure = None
+    started = time.perf_counter()
+    try:
+        async for delta in client.stream_chat(llm_payload(user_input, STREAMING_STRUCTURE_PROMPT), timeout=llm_breaker.deadline()):
+            text += delta
+            for item in parser.feed(text):
+                week = streamed_week(item) if complete else None
+                if week is None:
+                    complete = False
+                    continue
+                weeks.append(week)
+                if len(weeks) <= INITIAL_WEEKS:
+                    yield "week", week
         
-        if response.status_code == 200:
-            result = response.json()
-            return json.loads(result["choices"][0]["message"]["content"])
+        result, repairs = extract_json(text)
+        if not complete:
+            repairs.append("invalid_week")
+        for repair in repairs:
+            llm_repairs.inc(repair)
+        # Header fields of the wrong type are left for the template, like missing ones
+        title, overview = (value if isinstance(value, str) else None for value in (result.get("title"), result.get("overview")))
+        structure = {
+            "title": title,
+            "overview": overview,
+            "weekly_themes": [w[0] for w in weeks],
+            "weekly_focus": [w[1] for w in weeks],
+            "weekly_objectives": [w[2] for w in weeks]
+        }
+        llm_outcomes.inc("success")
+        stage_latency.observe(time.perf_counter() - started, "llm_stream")
+        # Same salvage rules as fetch_ai_structure: top up from the template and only cache complete answers
+        if fill_from_template(structure, create_basic_structure(user_input)):
+            for week in structure_weeks(structure)[len(weeks):]:
+                yield "week", week
+        else:
+            await response_cache.aset(key, structure, time.perf_counter() - started)
     
-    except:
-        pass
+    except (LLMError, KeyError, TypeError, ValueError) as e:
+        failure = e
+        record_llm_failure(e)
+        # Keep the weeks already sent and finish the plan from the basic template
+        structure = create_basic_structure(user_input)
+        for i, (theme, focus, objectives) in enumerate(weeks[:len(structure["weekly_themes"])]):
+            structure["weekly_themes"][i] = theme
+            structure["weekly_focus"][i] = focus
+            structure["weekly_objectives"][i] = objectives
+        for week in structure_weeks(structure)[len(weeks):]:
+            yield "week", week
     
-    return create_basic_structure(user_input)
+    finally:
+        # Malformed output still means the upstream answered; only transport/status failures count against it
+        if isinstance(failure, LLMError):
+            llm_breaker.record_failure(time.perf_counter() - started)
+        elif structure is not None:
+            llm_breaker.record_success(time.perf_counter() - started)
+        else:
+            llm_breaker.release()
+    
+    yield "structure", structure
+
+def structure_weeks(structure: dict, limit: int = INITIAL_WEEKS) -> list:
+    """(theme, focus, objectives) for each week that makes it into the plan"""
+    # Lists of different lengths (older cache entries) only yield the weeks present in all three
+    count = min(limit, len(structure["weekly_themes"]), len(structure["weekly_focus"]), len(structure["weekly_objectives"]))
+    return [
+        (structure["weekly_themes"][i], structure["weekly_focus"][i], structure["weekly_objectives"][i])
+        for i in range(count)
+    ]
+
+def structure_cache_key(user_input: EnhancedUserInput) -> str:
+    """Cache key from the normalized fields that shape the LLM prompt"""
+    return cache_key(user_input.goal, user_input.proficiency, user_input.time_commitment,
+                     user_input.learning_style, user_input.weeks)
+
+# Template plan phases; a longer plan spends proportionally more weeks in each
+BASIC_PHASES = [
+    ("Foundation & Setup", "Learn basics and set up environment", ["Install tools", "Learn syntax", "First program"]),
+    ("Core Concepts", "Master fundamental concepts", ["Practice concepts", "Debug issues", "Small projects"]),
+    ("Advanced Techniques", "Explore advanced features", ["Advanced features", "Optimization", "Testing"]),
+    ("Real Projects", "Build complete applications", ["Portfolio project", "Deployment", "Documentation"])
+]
 
 def create_basic_structure(user_input: EnhancedUserInput) -> dict:
     """Create basic roadmap structure"""
-    weeks = 4
+    weeks = user_input.weeks
     return {
         "title": f"Learn {user_input.goal} - {user_input.proficiency} Roadmap",
         "overview": f"A {weeks}-week journey to master {user_input.goal} through hands-on projects and real resources.",
-        "weekly_themes": [
-            "Foundation & Setup",
-            "Core Concepts", 
-            "Advanced Techniques",
-            "Real Projects"
-        ],
-        "weekly_focus": [
-            "Learn basics and set up environment",
-            "Master fundamental concepts",
-            "Explore advanced features",
-            "Build complete applications"
-        ],
-        "weekly_objectives": [
-            ["Install tools", "Learn syntax", "First program"],
-            ["Practice concepts", "Debug issues", "Small projects"],
-            ["Advanced features", "Optimization", "Testing"],
-            ["Portfolio project", "Deployment", "Documentation"]
-        ]
+        **basic_weeks(1, min(INITIAL_WEEKS, weeks), weeks)
     }
 
-def enhance_with_real_content(structure: dict, topic: str, user_input: EnhancedUserInput) -> dict:
+def basic_weeks(first: int, last: int, total: int) -> dict:
+    """Template weeks first..last of a total-week plan, as structure fields"""
+    themes, focus, objectives = [], [], []
+    for week in range(first, last + 1):
+        phase = (week - 1) * len(BASIC_PHASES) // total
+        # Weeks of this phase: the ceiling of each phase boundary
+        start = -(-phase * total // len(BASIC_PHASES)) + 1
+        end = -(-(phase + 1) * total // len(BASIC_PHASES))
+        theme, phase_focus, phase_objectives = BASIC_PHASES[phase]
+        if end > start:
+            theme = f"{theme} ({week - start + 1}/{end - start + 1})"
+        themes.append(theme)
+        focus.append(phase_focus)
+        objectives.append(list(phase_objectives))
+    return {"weekly_themes": themes, "weekly_focus": focus, "weekly_objectives": objectives}
+
+def enhance_with_real_content(structure: dict, topic: str, user_input: EnhancedUserInput,
+                              content: Optional[CatalogSnapshot] = None) -> dict:
     """Enhance AI structure with real content"""
     
-    # Get real resources for this topic
-    topic_resources = REAL_RESOURCES.get(topic, REAL_RESOURCES["python"])
-    topic_projects = REAL_PROJECTS.get(topic, REAL_PROJECTS["python"])
+    # One catalog snapshot per roadmap, so a hot reload never mixes versions
+    content = content or catalog.current
     
     # Build weekly plan with REAL resources
-    weekly_plan = []
-    for i in range(min(4, len(structure["weekly_themes"]))):
-        week_num = i + 1
-        
-        # Select appropriate resources
-        week_resources = []
-        if i == 0:  # Week 1 - Basics
-            week_resources = [r for r in topic_resources if r["type"] in ["Video", "Course"]][:2]
-        elif i == 1:  # Week 2 - Intermediate
-            week_resources = [r for r in topic_resources if r["type"] in ["Article", "Course"]][:2]
-        else:  # Week 3-4 - Advanced
-            week_resources = [r for r in topic_resources if r["type"] in ["Project", "Video"]][:2]
-        
-        # Add project
-        project_index = min(i, len(topic_projects) - 1)
-        week_project = topic_projects[project_index] if topic_projects else {
-            "title": f"Week {week_num} Project",
-            "description": "Hands-on project to apply what you learned",
-            "github_template": "https://github.com/",
-            "skills": ["Problem Solving", "Coding", "Debugging"]
-        }
-        
-        weekly_plan.append({
-            "week": week_num,
-            "theme": structure["weekly_themes"][i],
-            "focus": structure["weekly_focus"][i],
-            "objectives": structure["weekly_objectives"][i],
-            "time_estimate": f"{10 + i*5}-{15 + i*5} hours",
-            "resources": week_resources,
-            "project": week_project
-        })
+    weekly_plan = [
+        build_week(i, theme, focus, objectives, content, topic)
+        for i, (theme, focus, objectives) in enumerate(structure_weeks(structure))
+    ]
     
     return {
         "title": structure["title"],
         "overview": structure["overview"],
-        "prerequisites": {
-            "knowledge": ["Basic computer skills", "Internet access"],
-            "tools": ["Computer", "Code editor", "Git"]
-        },
+        "total_weeks": user_input.weeks,
+        "prerequisites": ROADMAP_PREREQUISITES,
         "weekly_plan": weekly_plan,
-        "milestone_projects": topic_projects[:3],
-        "success_tips": [
-            "Code every day, even for 30 minutes",
-            "Build projects that interest you",
-            "Join communities for support",
-            "Document your learning journey",
-            "Teach others what you learn"
-        ],
-        "community_recommendations": [
-            "Discord: Learn Together",
-            "Reddit: r/learnprogramming", 
-            "GitHub: Open Source",
-            "Dev.to Community"
-        ],
+        "milestone_projects": content.projects(topic, 3),
+        "success_tips": ROADMAP_SUCCESS_TIPS,
+        "community_recommendations": ROADMAP_COMMUNITY_RECOMMENDATIONS,
         "visual_timeline": generate_timeline_data(weekly_plan)
     }
 
+def compile_topic_template(content: CatalogSnapshot, topic: str) -> dict:
+    """Pre-serialize every part of a topic's roadmap that does not depend on the request"""
+    weeks = [build_week(i, "", "", [], content, topic) for i in range(INITIAL_WEEKS)]
+    return {
+        "prerequisites": fields({"prerequisites": ROADMAP_PREREQUISITES}, ["prerequisites"]),
+        "week_tails": [fields(week, ["time_estimate", "resources", "project"]) for week in weeks],
+        "week_projects": [dumps(week["project"]["title"]) for week in weeks],
+        "extras": fields({
+            "milestone_projects": content.projects(topic, 3),
+            "success_tips": ROADMAP_SUCCESS_TIPS,
+            "community_recommendations": ROADMAP_COMMUNITY_RECOMMENDATIONS
+        }, ["milestone_projects", "success_tips", "community_recommendations"]),
+        "fallback": dumps(fallback_static_parts(content, topic))[1:-1]
+    }
+
+def render_roadmap_json(structure: dict, topic: str, roadmap_id: str, generated_at: str, content: CatalogSnapshot,
+                        total_weeks: int = INITIAL_WEEKS) -> bytes:
+    """JSON for enhance_with_real_content(...) plus metadata, spliced from cached fragments"""
+    template = roadmap_templates.get(content, topic)
+    
+    weekly_plan = []
+    timeline = []
+    for i, (theme, focus, objectives) in enumerate(structure_weeks(structure)):
+        week = b'"week":%d' % (i + 1)
+        theme, objectives = dumps(theme), dumps(objectives)
+        weekly_plan.append(b'{%s,"theme":%s,"focus":%s,"objectives":%s,%s}' % (
+            week, theme, dumps(focus), objectives, template["week_tails"][i]))
+        timeline.append(b'{%s,"theme":%s,"milestones":%s,"project":%s}' % (
+            week, theme, objectives, template["week_projects"][i]))
+    
+    return join_object(
+        fields(structure, ["title", "overview"]),
+        b'"total_weeks":%d' % total_weeks,
+        template["prerequisites"],
+        b'"weekly_plan":' + join_array(weekly_plan),
+        template["extras"],
+        b'"visual_timeline":' + join_array(timeline),
+        fields({"roadmap_id": roadmap_id, "generated_at": generated_at, "topic": topic}, ["roadmap_id", "generated_at", "topic"])
+    )
+
+def build_week(i: int, theme: str, focus: str, objectives: list, content: CatalogSnapshot, topic: str) -> dict:
+    """Build one week of the plan with real resources and a project"""
+    week_num = i + 1
+    
+    # Select appropriate resources
+    week_resources = []
+    if i == 0:  # Week 1 - Basics
+        week_resources = content.resources(topic, ["Video", "Course"], 2)
+    elif i == 1:  # Week 2 - Intermediate
+        week_resources = content.resources(topic, ["Article", "Course"], 2)
+    else:  # Week 3-4 - Advanced
+        week_resources = content.resources(topic, ["Project", "Video"], 2)
+    
+    # Add project: the initial weeks repeat the topic's last project once they run out,
+    # later weeks of long plans cycle through them
+    topic_projects = content.projects(topic)
+    if topic_projects:
+        project_index = min(i, len(topic_projects) - 1) if i < INITIAL_WEEKS else i % len(topic_projects)
+    week_project = topic_projects[project_index] if topic_projects else {
+        "title": f"Week {week_num} Project",
+        "description": "Hands-on project to apply what you learned",
+        "github_template": "https://github.com/",
+        "skills": ["Problem Solving", "Coding", "Debugging"]
+    }
+    
+    return {
+        "week": week_num,
+        "theme": theme,
+        "focus": focus,
+        "objectives": objectives,
+        "time_estimate": f"{10 + min(i, 3)*5}-{15 + min(i, 3)*5} hours",
+        "resources": week_resources,
+        "project": week_project
+    }
+
 def generate_timeline_data(weekly_plan: list) -> list:
     """Generate data for visual timeline"""
     timeline = []
@@ -327,15 +972,42 @@ def generate_timeline_data(weekly_plan: list) -> list:
 def create_fallback_roadmap(user_input: EnhancedUserInput, topic: str) -> dict:
     """Create a complete roadmap with real content as fallback"""
     
-    topic_resources = REAL_RESOURCES.get(topic, REAL_RESOURCES["python"])
-    topic_projects = REAL_PROJECTS.get(topic, REAL_PROJECTS["python"])
-    
     roadmap_id = str(uuid.uuid4())[:8]
+    content = catalog.current
     
-    return {
+    roadmap = {
         "roadmap_id": roadmap_id,
+        **fallback_header(user_input),
+        **fallback_static_parts(content, topic),
+        "generated_at": datetime.now().isoformat(),
+        "topic": topic
+    }
+    
+    # Longer plans stretch the template phases over every requested week
+    weeks = user_input.weeks
+    if weeks != INITIAL_WEEKS:
+        weekly_plan = [
+            build_week(i, theme, focus, objectives, content, topic)
+            for i, (theme, focus, objectives) in enumerate(structure_weeks(basic_weeks(1, weeks, weeks), weeks))
+        ]
+        roadmap["weekly_plan"] = weekly_plan
+        roadmap["visual_timeline"] = generate_timeline_data(weekly_plan)
+    
+    return roadmap
+
+def fallback_header(user_input: EnhancedUserInput) -> dict:
+    return {
         "title": f"Hands-On {user_input.goal} Learning Roadmap",
         "overview": f"A practical {user_input.time_commitment} journey to master {user_input.goal} through real projects and working resources.",
+        "total_weeks": user_input.weeks
+    }
+
+def fallback_static_parts(content: CatalogSnapshot, topic: str) -> dict:
+    """The request-independent body of the fallback roadmap"""
+    
+    topic_projects = content.projects(topic, 3)
+    
+    return {
         "prerequisites": {
             "knowledge": ["Basic computer literacy", "Problem-solving mindset"],
             "tools": ["Computer with internet", "Modern browser", "Code editor"]
@@ -347,7 +1019,7 @@ def create_fallback_roadmap(user_input: EnhancedUserInput, topic: str) -> dict:
                 "focus": "Learn the basics and set up your development environment",
                 "objectives": ["Install necessary tools", "Learn basic syntax", "Complete first project"],
                 "time_estimate": "10-15 hours",
-                "resources": topic_resources[:2],
+                "resources": content.resources(topic, limit=2),
                 "project": topic_projects[0] if topic_projects else {
                     "title": "Hello World Project",
                     "description": "Create your first working application",
@@ -361,7 +1033,7 @@ def create_fallback_roadmap(user_input: EnhancedUserInput, topic: str) -> dict:
                 "focus": "Master fundamental concepts through hands-on exercises",
                 "objectives": ["Practice key concepts", "Build small applications", "Learn debugging"],
                 "time_estimate": "15-20 hours",
-                "resources": topic_resources[2:4],
+                "resources": content.resources(topic, limit=2, offset=2),
                 "project": topic_projects[1] if len(topic_projects) > 1 else {
                     "title": "Practical Application",
                     "description": "Build a functional application solving a real problem",
@@ -375,7 +1047,7 @@ def create_fallback_roadmap(user_input: EnhancedUserInput, topic: str) -> dict:
                 "focus": "Learn advanced features and optimization techniques",
                 "objectives": ["Implement advanced features", "Optimize performance", "Learn testing"],
                 "time_estimate": "20-25 hours",
-                "resources": [r for r in topic_resources if r["type"] == "Project"][:2],
+                "resources": content.resources(topic, ["Project"], 2),
                 "project": {
                     "title": "Advanced Project",
                     "description": "Create an optimized application with advanced features",
@@ -428,88 +1100,327 @@ def create_fallback_roadmap(user_input: EnhancedUserInput, topic: str) -> dict:
             {"week": 2, "theme": "Core Skills", "milestones": ["Practice", "Small Apps", "Debugging"]},
             {"week": 3, "theme": "Advanced", "milestones": ["Advanced Features", "Optimization", "Testing"]},
             {"week": 4, "theme": "Real World", "milestones": ["Portfolio Project", "Deployment", "Documentation"]}
-        ],
-        "generated_at": datetime.now().isoformat(),
-        "topic": topic
+        ]
     }
 
+def render_fallback_json(user_input: EnhancedUserInput, topic: str) -> bytes:
+    """JSON for create_fallback_roadmap, spliced from the topic's cached fragments"""
+    if user_input.weeks != INITIAL_WEEKS:
+        # Only the default-length body is pre-serialized
+        return dumps(create_fallback_roadmap(user_input, topic))
+    
+    template = roadmap_templates.get(catalog.current, topic)
+    return join_object(
+        fields({"roadmap_id": str(uuid.uuid4())[:8]}, ["roadmap_id"]),
+        dumps(fallback_header(user_input))[1:-1],
+        template["fallback"],
+        fields({"generated_at": datetime.now().isoformat(), "topic": topic}, ["generated_at", "topic"])
+    )
+
+# Compiled per topic during startup (load_catalog), and again whenever the catalog is reloaded
+roadmap_templates = TemplateCache(compile_topic_template)
+
+def apply_progress_update(progress: dict, total_weeks: int, update: ProgressUpdate):
+    """Fold one update into the compact progress; counters only move when a bit flips"""
+    week = update.week_completed
+    if not 1 <= week <= total_weeks:
+        raise ValueError(f"week_completed must be between 1 and {total_weeks}")
+    mark(progress, "weeks", week)
+    if update.project_done:
+        mark(progress, "projects", week)
+
+def progress_note(update: ProgressUpdate) -> Optional[dict]:
+    if not update.notes:
+        return None
+    return {"week": update.week_completed, "note": update.notes, "timestamp": datetime.now().isoformat()}
+
 @app.post("/update-progress")
 def update_progress(update: ProgressUpdate):
     """Update user progress"""
-    if update.roadmap_id not in progress_db:
+    try:
+        progress, total_weeks = store.update_progress(
+            update.roadmap_id,
+            lambda progress, total_weeks: apply_progress_update(progress, total_weeks, update),
+            progress_note(update)
+        )
+    except KeyError:
         raise HTTPException(status_code=404, detail="Roadmap not found")
-    
-    progress = progress_db[update.roadmap_id]["progress"]
-    
-    if update.week_completed not in progress["completed_weeks"]:
-        progress["completed_weeks"].append(update.week_completed)
-    
-    if update.project_done:
-        progress.setdefault("completed_projects", []).append(update.week_completed)
-    
-    if update.notes:
-        progress.setdefault("notes", []).append({
-            "week": update.week_completed,
-            "note": update.notes,
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    roadmap = progress_db[update.roadmap_id]["roadmap"]
-    total_weeks = len(roadmap.get("weekly_plan", []))
-    completed = len(progress["completed_weeks"])
-    percentage = (completed / total_weeks * 100) if total_weeks > 0 else 0
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
     return {
         "status": "success",
-        "progress_percentage": round(percentage, 1),
-        "completed_weeks": progress["completed_weeks"],
+        "progress_percentage": progress_stats(progress, total_weeks)["progress_percentage"],
+        "completed_weeks": weeks_in(progress["weeks_mask"]),
         "total_weeks": total_weeks
     }
 
+PROGRESS_BATCH_MAX_EVENTS = int(os.getenv("PROGRESS_BATCH_MAX_EVENTS", "1000"))
+
+@app.post("/update-progress/batch")
+def update_progress_batch(request: ProgressBatchRequest):
+    """Apply queued progress events for many roadmaps; one atomic store write per roadmap"""
+    if len(request.events) > PROGRESS_BATCH_MAX_EVENTS:
+        raise HTTPException(status_code=400, detail=f"At most {PROGRESS_BATCH_MAX_EVENTS} events per batch")
+    
+    # Group by roadmap, keeping each roadmap's events in submission order
+    groups = {}
+    for index, event in enumerate(request.events):
+        groups.setdefault(event.roadmap_id, []).append((index, event))
+    
+    results = [None] * len(request.events)
+    roadmaps = {}
+    for roadmap_id, group in groups.items():
+        try:
+            outcomes, progress, total_weeks = store.update_progress_batch(
+                roadmap_id,
+                [(event.idempotency_key, event) for _, event in group],
+                apply_progress_event
+            )
+        except KeyError:
+            outcomes = [("not_found", "Roadmap not found")] * len(group)
+        except Exception as e:
+            # The group's transaction rolled back, so none of its events were applied
+            logger.exception("Progress batch failed for roadmap %s", roadmap_id)
+            outcomes = [("error", str(e))] * len(group)
+        else:
+            # Same shape as the /update-progress response
+            roadmaps[roadmap_id] = {
+                "progress_percentage": progress_stats(progress, total_weeks)["progress_percentage"],
+                "completed_weeks": weeks_in(progress["weeks_mask"]),
+                "total_weeks": total_weeks
+            }
+        
+        for (index, event), (status, error) in zip(group, outcomes):
+            result = {"index": index, "roadmap_id": roadmap_id, "status": status}
+            if event.idempotency_key is not None:
+                result["idempotency_key"] = event.idempotency_key
+            if error is not None:
+                result["error"] = error
+            results[index] = result
+    
+    summary = {"events": len(results), "roadmaps": len(groups)}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return {"results": results, "roadmaps": roadmaps, "summary": summary}
+
+def apply_progress_event(progress: dict, total_weeks: int, event: ProgressEvent) -> Optional[dict]:
+    apply_progress_update(progress, total_weeks, event)
+    return progress_note(event)
+
 @app.get("/roadmap/{roadmap_id}")
 def get_roadmap(roadmap_id: str):
     """Get roadmap with progress"""
-    if roadmap_id not in progress_db:
+    record = store.get_document(roadmap_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
-    data = progress_db[roadmap_id].copy()
-    progress = data["progress"]
+    document, progress, total_weeks, created_at = record
     
-    total_weeks = len(data["roadmap"].get("weekly_plan", []))
-    completed = len(progress.get("completed_weeks", []))
+    # Weeks past the initial ones are stored (or still to be generated) outside the document,
+    # so only longer plans decode it
+    if total_weeks > INITIAL_WEEKS:
+        roadmap = json.loads(document)
+        extra = later_weeks(roadmap_id, len(roadmap["weekly_plan"]), total_weeks, roadmap["topic"])
+        if extra:
+            roadmap["weekly_plan"] += extra
+            roadmap["visual_timeline"] += generate_timeline_data(extra)
+            document = dumps(roadmap)
+    if isinstance(document, str):
+        document = document.encode("utf-8")
     
-    data["stats"] = {
-        "progress_percentage": round((completed / total_weeks * 100) if total_weeks > 0 else 0, 1),
-        "completed_weeks": completed,
-        "total_weeks": total_weeks
+    # The stored roadmap is spliced in as-is; only the small progress document is decoded
+    extras = {
+        "progress": progress_view(progress),
+        "created_at": created_at,
+        "stats": progress_stats(progress, total_weeks)
+    }
+    return Response(join_object(b'"roadmap":' + document, fields(extras, extras)), media_type="application/json")
+
+NOTES_PAGE_MAX = 100
+
+@app.get("/roadmap/{roadmap_id}/notes")
+def get_roadmap_notes(roadmap_id: str, offset: int = 0, limit: int = 20):
+    """Page through the progress notes, oldest first"""
+    offset = max(0, offset)
+    limit = max(1, min(limit, NOTES_PAGE_MAX))
+    page = store.get_notes(roadmap_id, offset, limit)
+    if page is None:
+        raise HTTPException(status_code=404, detail="Roadmap not found")
+    
+    notes, total = page
+    return {
+        "notes": notes,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_offset": offset + len(notes) if offset + len(notes) < total else None
     }
+
+WEEKS_PAGE_MAX = 12
+
+@app.get("/roadmap/{roadmap_id}/weeks")
+async def get_roadmap_weeks(roadmap_id: str, offset: int = 0, limit: int = WEEK_PAGE_SIZE):
+    """Page through a roadmap's weeks, generating and storing any that were not produced yet"""
+    offset = max(0, offset)
+    limit = max(1, min(limit, WEEKS_PAGE_MAX))
+    
+    plan = await asyncio.to_thread(store.get_plan, roadmap_id)
+    record = None
+    if plan is None or offset < len(plan["themes"]):
+        record = await asyncio.to_thread(store.get_document, roadmap_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Roadmap not found")
+    
+    # Roadmaps stored before lazy weeks carry their whole plan in the document
+    total_weeks = plan["total_weeks"] if plan is not None else record[2]
+    initial = len(plan["themes"]) if plan is not None else total_weeks
+    first, last = offset + 1, min(total_weeks, offset + limit)
+    
+    weeks = {}
+    if first <= initial:
+        weekly_plan = json.loads(record[0])["weekly_plan"]
+        weeks.update((week, dumps(weekly_plan[week - 1])) for week in range(first, min(last, initial) + 1))
+    if last > initial:
+        weeks.update(await asyncio.to_thread(store.get_weeks, roadmap_id, max(first, initial + 1), last))
+        missing_pages = sorted({week_page_start(week, initial) for week in range(max(first, initial + 1), last + 1)
+                                if week not in weeks})
+        pages = await asyncio.gather(*(
+            inflight_generations.do(f"{roadmap_id}:weeks:{start}", lambda start=start: generate_week_page(roadmap_id, plan, start))
+            for start in missing_pages
+        ))
+        for page in pages:
+            weeks.update(page)
     
-    return data
+    page = [weeks[week] if isinstance(weeks[week], bytes) else weeks[week].encode("utf-8")
+            for week in range(first, last + 1)]
+    next_offset = last if last < total_weeks else None
+    return Response(join_object(
+        b'"weeks":' + join_array(page),
+        fields({"offset": offset, "limit": limit, "total_weeks": total_weeks, "next_offset": next_offset},
+               ["offset", "limit", "total_weeks", "next_offset"])
+    ), media_type="application/json")
+
+def week_page_start(week: int, initial: int) -> int:
+    """First week of the generation page holding week; pages are aligned after the initial weeks"""
+    return initial + 1 + (week - initial - 1) // WEEK_PAGE_SIZE * WEEK_PAGE_SIZE
+
+async def generate_week_page(roadmap_id: str, plan: dict, first: int) -> dict:
+    """Generate, render and store one page of later weeks; {week number: week JSON}
+    
+    Only pages that came entirely from the LLM are stored. Template weeks (no API key,
+    open circuit, failed or partial answers) are served marked pending and generated
+    again on the next request, as later_weeks shows them until then.
+    """
+    last = min(plan["total_weeks"], first + WEEK_PAGE_SIZE - 1)
+    user_input = EnhancedUserInput(**plan["input"])
+    key = f"{structure_cache_key(user_input)}:weeks:{first}-{last}"
+    
+    def fallback():
+        return basic_weeks(first, last, plan["total_weeks"])
+    
+    structure, complete = await get_structure(key, lambda: week_page_payload(plan, first, last), fallback)
+    count = last - first + 1
+    generated = structure_weeks(structure, count)
+    # Short LLM answers are topped up from the template
+    template_weeks = structure_weeks(fallback(), count)
+    complete = complete and len(generated) == count
+    
+    content = catalog.current
+    weeks = {}
+    for i in range(count):
+        week = build_week(first - 1 + i, *(generated[i] if i < len(generated) else template_weeks[i]), content, plan["topic"])
+        if not complete:
+            week["pending"] = True
+        weeks[first + i] = dumps(week)
+    if complete:
+        with stage("store"):
+            await asyncio.to_thread(store.save_weeks, roadmap_id, weeks)
+    return weeks
+
+def later_weeks(roadmap_id: str, initial: int, total_weeks: int, topic: str) -> list:
+    """Weeks initial+1..total_weeks: generated ones from the store, pending template weeks for the rest"""
+    if total_weeks <= initial:
+        return []
+    first = initial + 1
+    stored = store.get_weeks(roadmap_id, first, total_weeks)
+    template = structure_weeks(basic_weeks(first, total_weeks, total_weeks), total_weeks)
+    content = catalog.current
+    
+    weeks = []
+    for week, (theme, focus, objectives) in enumerate(template, first):
+        if week in stored:
+            weeks.append(json.loads(stored[week]))
+        else:
+            # What /roadmap/{id}/weeks falls back to; it replaces this once the week is generated
+            weeks.append({**build_week(week - 1, theme, focus, objectives, content, topic), "pending": True})
+    return weeks
 
 @app.get("/visual-timeline/{roadmap_id}")
 def get_visual_timeline(roadmap_id: str):
     """Get visual timeline data for charts"""
-    if roadmap_id not in progress_db:
+    record = store.get_document(roadmap_id)
+    if record is None:
         raise HTTPException(status_code=404, detail="Roadmap not found")
     
-    roadmap = progress_db[roadmap_id]["roadmap"]
-    progress = progress_db[roadmap_id]["progress"]
+    document, progress, total_weeks, _ = record
+    roadmap = json.loads(document)
+    weekly_plan = roadmap["weekly_plan"] + later_weeks(roadmap_id, len(roadmap["weekly_plan"]), total_weeks, roadmap["topic"])
     
     timeline_data = []
-    for week in roadmap.get("weekly_plan", []):
+    for week in weekly_plan:
         timeline_data.append({
             "week": week["week"],
             "theme": week["theme"],
-            "completed": week["week"] in progress.get("completed_weeks", []),
+            "completed": is_marked(progress, "weeks", week["week"]),
+            "pending": week.get("pending", False),
             "project": week["project"]["title"]
         })
     
     return {
         "timeline": timeline_data,
-        "total_weeks": len(timeline_data),
-        "completed_weeks": len(progress.get("completed_weeks", []))
+        "total_weeks": total_weeks,
+        "completed_weeks": progress["weeks_done"]
     }
 
+@app.post("/catalog/reload")
+def reload_catalog():
+    """Re-read catalog.json now and rebuild its indexes"""
+    try:
+        catalog.reload()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=500, detail=f"Catalog reload failed: {str(e)}")
+    return {"status": "reloaded", "entries": catalog.current.size, "version": catalog.current.version}
+
+registry.register(Gauge("roadmap_store_roadmaps", "Roadmaps held in the store", lambda: len(store)))
+registry.register(Gauge("roadmap_cache_entries", "Entries in the LLM response cache", lambda: len(response_cache.backend)))
+registry.register(Gauge("roadmap_cache_hit_ratio", "LLM response cache hit ratio", lambda: response_cache.stats()["hit_rate"]))
+registry.register(Gauge("roadmap_circuit_state", "LLM circuit breaker state (0 closed, 1 half-open, 2 open)",
+                        lambda: ["closed", "half_open", "open"].index(llm_breaker.state)))
+registry.register(Gauge("roadmap_llm_deadline_seconds", "Adaptive per-call LLM deadline", llm_breaker.deadline))
+registry.register(Gauge("roadmap_jobs_queued", "Async generation jobs waiting for a worker", lambda: generation_jobs.queued))
+registry.register(Gauge("roadmap_jobs_running", "Async generation jobs being processed", lambda: generation_jobs.running))
+registry.register(Gauge("roadmap_llm_in_flight", "Distinct LLM generations in flight", lambda: inflight_generations.stats()["in_flight"]))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text exposition of request, stage, LLM and store metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    """Response cache counters (hits, misses, evictions, saved LLM time)"""
+    stats = response_cache.stats()
+    stats["singleflight"] = inflight_generations.stats()
+    stats["circuit"] = llm_breaker.stats()
+    stats["router"] = llm_client.stats() if llm_client is not None else None
+    stats["jobs"] = generation_jobs.stats()
+    return stats
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    # WEB_CONCURRENCY worker processes share roadmaps, progress, jobs and the LLM cache through SQLite;
+    # uvicorn needs the import string to start more than one
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run("main:app" if workers > 1 else app, host=os.getenv("ROADMAP_HOST", "127.0.0.1"),
+                port=int(os.getenv("ROADMAP_PORT", "8000")), workers=workers)
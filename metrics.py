@@ -0,0 +1,148 @@
+# metrics.py - PROMETHEUS-STYLE METRICS AND PER-REQUEST STAGE TIMINGS
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Stage timings for the current request, when the caller asked for them
+_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("spans", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # per-bucket counts, then sum and count
+                series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time"""
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]):
+        self.name, self.help, self.read = name, help, read
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {self.read()}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "roadmap_http_requests_total", "HTTP requests by route and status", ["method", "route", "status"]))
+http_latency = registry.register(Histogram(
+    "roadmap_http_request_seconds", "HTTP request latency by route, through the last body chunk", ["method", "route"]))
+stage_latency = registry.register(Histogram(
+    "roadmap_stage_seconds", "Latency of each generation stage", ["stage"]))
+llm_outcomes = registry.register(Counter(
+    "roadmap_llm_requests_total", "LLM calls by outcome (success, timeout, error, parse_failure)", ["outcome"]))
+fallbacks = registry.register(Counter(
+    "roadmap_fallbacks_total", "Roadmaps served from templates instead of the LLM, by reason", ["reason"]))
+llm_backend_calls = registry.register(Counter(
+    "roadmap_llm_backend_requests_total", "LLM calls per routed backend by outcome (success, error, invalid, cancelled)",
+    ["backend", "outcome"]))
+llm_backend_latency = registry.register(Histogram(
+    "roadmap_llm_backend_seconds", "Latency of completed LLM calls per routed backend", ["backend"]))
+llm_hedges = registry.register(Counter(
+    "roadmap_llm_hedges_total", "Hedged LLM requests, by whether the hedge answered first", ["won"]))
+llm_repairs = registry.register(Counter(
+    "roadmap_llm_repairs_total",
+    "Repairs applied to LLM output (fence, prose, truncated, length_mismatch, invalid_week) and template_weeks filled in",
+    ["repair"]))
+
+
+@contextmanager
+def stage(name: str):
+    """Time a hot-path stage into roadmap_stage_seconds and the request's span list"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_latency.observe(elapsed, name)
+        spans = _spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def start_spans() -> List[Tuple[str, float]]:
+    """Collect stage timings for the rest of this request"""
+    spans = []
+    _spans.set(spans)
+    return spans
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """Server-Timing header value, durations in milliseconds"""
+    parts = [f"{name};dur={elapsed * 1000:.2f}" for name, elapsed in spans]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
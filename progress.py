@@ -0,0 +1,94 @@
+# progress.py - COMPACT PROGRESS STATE WITH INCREMENTAL STATS
+from typing import Callable, List, Set
+
+
+def new_progress() -> dict:
+    """Completed weeks/projects as bitmasks (bit i = week i + 1), with running counters"""
+    return {"weeks_mask": 0, "projects_mask": 0, "weeks_done": 0, "projects_done": 0, "notes_total": 0}
+
+
+def upgrade_progress(progress: dict) -> dict:
+    """Convert a list-based progress document from older stores; compact ones pass through"""
+    if "weeks_mask" in progress:
+        return progress
+    upgraded = new_progress()
+    for kind in ("weeks", "projects"):
+        for week in progress.get(f"completed_{kind}", []):
+            if isinstance(week, int) and week >= 1:
+                mark(upgraded, kind, week)
+    upgraded["notes_total"] = len(progress.get("notes", []))
+    return upgraded
+
+
+def mark(progress: dict, kind: str, week: int) -> bool:
+    """Set a week's bit in the weeks or projects mask; False if it was already set"""
+    bit = 1 << (week - 1)
+    if progress[f"{kind}_mask"] & bit:
+        return False
+    progress[f"{kind}_mask"] |= bit
+    progress[f"{kind}_done"] += 1
+    return True
+
+
+def is_marked(progress: dict, kind: str, week: int) -> bool:
+    return week >= 1 and bool(progress[f"{kind}_mask"] >> (week - 1) & 1)
+
+
+def weeks_in(mask: int) -> List[int]:
+    """Week numbers whose bits are set, ascending"""
+    weeks = []
+    week = 1
+    while mask:
+        if mask & 1:
+            weeks.append(week)
+        mask >>= 1
+        week += 1
+    return weeks
+
+
+def progress_stats(progress: dict, total_weeks: int) -> dict:
+    """Stats from the running counters; no rescans"""
+    completed = progress["weeks_done"]
+    return {
+        "progress_percentage": round((completed / total_weeks * 100) if total_weeks > 0 else 0, 1),
+        "completed_weeks": completed,
+        "completed_projects": progress["projects_done"],
+        "total_weeks": total_weeks
+    }
+
+
+def progress_view(progress: dict) -> dict:
+    """Public shape of the progress document; notes are paged separately"""
+    return {
+        "completed_weeks": weeks_in(progress["weeks_mask"]),
+        "completed_projects": weeks_in(progress["projects_mask"]),
+        "notes_total": progress["notes_total"]
+    }
+
+
+def apply_events(progress: dict, total_weeks: int, events: list, seen: Set[str], apply: Callable) -> tuple:
+    """Fold (idempotency_key, event) pairs into progress in order
+
+    apply(progress, total_weeks, event) returns the event's note or None,
+    and raises ValueError to reject it. Returns the per-event
+    (status, error) outcomes, the notes to append (numbered) and the newly
+    used keys; seen is updated so a key repeated within the batch counts once.
+    """
+    outcomes, notes, keys = [], [], []
+    for key, event in events:
+        if key is not None and key in seen:
+            outcomes.append(("duplicate", None))
+            continue
+        try:
+            note = apply(progress, total_weeks, event)
+        except ValueError as e:
+            outcomes.append(("rejected", str(e)))
+            continue
+        if key is not None:
+            seen.add(key)
+            keys.append(key)
+        if note is not None:
+            progress["notes_total"] += 1
+            notes.append({"seq": progress["notes_total"], **note})
+        outcomes.append(("applied", None))
+    return outcomes, notes, keys
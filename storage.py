@@ -0,0 +1,370 @@
+# storage.py - PERSISTENT ROADMAP AND PROGRESS STORAGE
+import json
+import os
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from progress import apply_events, new_progress, upgrade_progress
+
+
+class MemoryStore:
+    """Process-local store, useful for development and single-worker runs"""
+
+    def __init__(self, max_notes: int = 500):
+        self.max_notes = max_notes
+        self._roadmaps = {}
+        self._progress = {}
+        self._notes = {}
+        self._event_keys = {}
+        self._plans = {}
+        self._weeks = {}
+        self._lock = threading.Lock()
+
+    def save_roadmap(self, roadmap_id: str, roadmap: dict, created_at: str, plan: Optional[dict] = None):
+        total_weeks = roadmap.get("total_weeks", len(roadmap.get("weekly_plan", [])))
+        self.save_roadmap_json(roadmap_id, json.dumps(roadmap), total_weeks, created_at, plan)
+
+    def save_roadmap_json(self, roadmap_id: str, document: Union[str, bytes], total_weeks: int, created_at: str,
+                          plan: Optional[dict] = None):
+        """Store an already serialized roadmap document, plus the context for generating its later weeks"""
+        with self._lock:
+            self._roadmaps[roadmap_id] = (document, total_weeks, created_at)
+            self._progress[roadmap_id] = new_progress()
+            self._notes[roadmap_id] = deque(maxlen=self.max_notes)
+            self._event_keys[roadmap_id] = set()
+            self._plans[roadmap_id] = plan
+            self._weeks[roadmap_id] = {}
+
+    def get_plan(self, roadmap_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._plans.get(roadmap_id)
+
+    def get_weeks(self, roadmap_id: str, first: int, last: int) -> Dict[int, str]:
+        """Stored week documents in first..last (1-based, inclusive)"""
+        with self._lock:
+            weeks = self._weeks.get(roadmap_id, {})
+            return {week: weeks[week] for week in range(first, last + 1) if week in weeks}
+
+    def save_weeks(self, roadmap_id: str, weeks: Dict[int, Union[str, bytes]]):
+        """Store generated weeks; a week that is already stored keeps its first version"""
+        with self._lock:
+            stored = self._weeks.get(roadmap_id)
+            if stored is None:
+                return
+            for week, document in weeks.items():
+                stored.setdefault(week, document)
+
+    def get_document(self, roadmap_id: str) -> Optional[tuple]:
+        """(serialized roadmap, progress, total_weeks, created_at) without decoding the roadmap"""
+        with self._lock:
+            if roadmap_id not in self._roadmaps:
+                return None
+            document, total_weeks, created_at = self._roadmaps[roadmap_id]
+            return document, dict(self._progress[roadmap_id]), total_weeks, created_at
+
+    def update_progress(self, roadmap_id: str, apply: Callable[[dict, int], None],
+                        note: Optional[dict] = None) -> Tuple[dict, int]:
+        """Atomically read, modify and write progress (plus an optional note); raises KeyError if the roadmap is unknown"""
+        with self._lock:
+            _, total_weeks, _ = self._roadmaps[roadmap_id]
+            progress = dict(self._progress[roadmap_id])
+            apply(progress, total_weeks)
+            if note is not None:
+                progress["notes_total"] += 1
+                self._notes[roadmap_id].append({"seq": progress["notes_total"], **note})
+            self._progress[roadmap_id] = progress
+        return dict(progress), total_weeks
+
+    def update_progress_batch(self, roadmap_id: str, events: list, apply: Callable) -> Tuple[list, dict, int]:
+        """Apply (idempotency_key, event) pairs as one write; see progress.apply_events"""
+        with self._lock:
+            _, total_weeks, _ = self._roadmaps[roadmap_id]
+            progress = dict(self._progress[roadmap_id])
+            stored_keys = self._event_keys[roadmap_id]
+            seen = {key for key, _ in events if key is not None and key in stored_keys}
+            outcomes, notes, keys = apply_events(progress, total_weeks, events, seen, apply)
+            self._notes[roadmap_id].extend(notes)
+            stored_keys.update(keys)
+            self._progress[roadmap_id] = progress
+        return outcomes, dict(progress), total_weeks
+
+    def get_notes(self, roadmap_id: str, offset: int, limit: int) -> Optional[Tuple[List[dict], int]]:
+        """A page of the retained notes, oldest first, and how many are retained"""
+        with self._lock:
+            notes = self._notes.get(roadmap_id)
+            if notes is None:
+                return None
+            return list(islice(notes, offset, offset + limit)), len(notes)
+
+    def compact(self, ttl: timedelta) -> int:
+        cutoff = (datetime.now() - ttl).isoformat()
+        with self._lock:
+            expired = [rid for rid, (_, _, created_at) in self._roadmaps.items() if created_at < cutoff]
+            for rid in expired:
+                del self._roadmaps[rid]
+                del self._progress[rid]
+                del self._notes[rid]
+                del self._event_keys[rid]
+                del self._plans[rid]
+                del self._weeks[rid]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._roadmaps)
+
+
+class SQLiteStore:
+    """SQLite (WAL) store shared by every worker process on the host"""
+
+    SCHEMA = [
+        "CREATE TABLE IF NOT EXISTS roadmaps ("
+        "roadmap_id TEXT PRIMARY KEY, document TEXT NOT NULL, total_weeks INTEGER NOT NULL, created_at TEXT NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS idx_roadmaps_created_at ON roadmaps(created_at)",
+        "CREATE TABLE IF NOT EXISTS progress ("
+        "roadmap_id TEXT PRIMARY KEY REFERENCES roadmaps(roadmap_id) ON DELETE CASCADE, "
+        "data TEXT NOT NULL, updated_at TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS progress_notes ("
+        "roadmap_id TEXT NOT NULL REFERENCES roadmaps(roadmap_id) ON DELETE CASCADE, seq INTEGER NOT NULL, "
+        "week INTEGER NOT NULL, note TEXT NOT NULL, timestamp TEXT NOT NULL, PRIMARY KEY (roadmap_id, seq)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS progress_events ("
+        "roadmap_id TEXT NOT NULL REFERENCES roadmaps(roadmap_id) ON DELETE CASCADE, idempotency_key TEXT NOT NULL, "
+        "PRIMARY KEY (roadmap_id, idempotency_key)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS roadmap_plans ("
+        "roadmap_id TEXT PRIMARY KEY REFERENCES roadmaps(roadmap_id) ON DELETE CASCADE, plan TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS roadmap_weeks ("
+        "roadmap_id TEXT NOT NULL REFERENCES roadmaps(roadmap_id) ON DELETE CASCADE, week INTEGER NOT NULL, "
+        "document TEXT NOT NULL, PRIMARY KEY (roadmap_id, week)) WITHOUT ROWID",
+    ]
+    # Stored in PRAGMA user_version; bump it when SCHEMA or a one-off data upgrade changes
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: str, max_notes: int = 500):
+        self.path = path
+        self.max_notes = max_notes
+        self._local = threading.local()
+        conn = self._connection()
+        if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Create the schema and upgrade old rows once per database, not on every start"""
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Another process may have migrated while this one waited for the lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= self.SCHEMA_VERSION:
+                return
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            self._upgrade_progress_rows(conn)
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _upgrade_progress_rows(self, conn: sqlite3.Connection):
+        """Move list-based progress documents to the compact form, notes into progress_notes"""
+        rows = conn.execute("SELECT roadmap_id, data FROM progress WHERE data NOT LIKE '%weeks_mask%'").fetchall()
+        for roadmap_id, data in rows:
+            legacy = json.loads(data)
+            notes = legacy.get("notes", [])[-self.max_notes:]
+            progress = upgrade_progress(legacy)
+            first_seq = progress["notes_total"] - len(notes) + 1
+            conn.executemany(
+                "INSERT OR REPLACE INTO progress_notes (roadmap_id, seq, week, note, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [(roadmap_id, first_seq + i, n.get("week", 0), n.get("note", ""), n.get("timestamp", ""))
+                 for i, n in enumerate(notes)]
+            )
+            conn.execute("UPDATE progress SET data = ? WHERE roadmap_id = ?", (json.dumps(progress), roadmap_id))
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def save_roadmap(self, roadmap_id: str, roadmap: dict, created_at: str, plan: Optional[dict] = None):
+        total_weeks = roadmap.get("total_weeks", len(roadmap.get("weekly_plan", [])))
+        self.save_roadmap_json(roadmap_id, json.dumps(roadmap), total_weeks, created_at, plan)
+
+    def save_roadmap_json(self, roadmap_id: str, document: Union[str, bytes], total_weeks: int, created_at: str,
+                          plan: Optional[dict] = None):
+        """Store an already serialized roadmap document, plus the context for generating its later weeks"""
+        if isinstance(document, bytes):
+            document = document.decode("utf-8")
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO roadmaps (roadmap_id, document, total_weeks, created_at) VALUES (?, ?, ?, ?)",
+                (roadmap_id, document, total_weeks, created_at)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO progress (roadmap_id, data, updated_at) VALUES (?, ?, ?)",
+                (roadmap_id, json.dumps(new_progress()), created_at)
+            )
+            conn.execute("DELETE FROM progress_notes WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM progress_events WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM roadmap_weeks WHERE roadmap_id = ?", (roadmap_id,))
+            conn.execute("DELETE FROM roadmap_plans WHERE roadmap_id = ?", (roadmap_id,))
+            if plan is not None:
+                conn.execute("INSERT INTO roadmap_plans (roadmap_id, plan) VALUES (?, ?)", (roadmap_id, json.dumps(plan)))
+
+    def get_plan(self, roadmap_id: str) -> Optional[dict]:
+        row = self._connection().execute("SELECT plan FROM roadmap_plans WHERE roadmap_id = ?", (roadmap_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_weeks(self, roadmap_id: str, first: int, last: int) -> Dict[int, str]:
+        """Stored week documents in first..last (1-based, inclusive)"""
+        rows = self._connection().execute(
+            "SELECT week, document FROM roadmap_weeks WHERE roadmap_id = ? AND week BETWEEN ? AND ?",
+            (roadmap_id, first, last)
+        ).fetchall()
+        return dict(rows)
+
+    def save_weeks(self, roadmap_id: str, weeks: Dict[int, Union[str, bytes]]):
+        """Store generated weeks; a week that is already stored keeps its first version"""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO roadmap_weeks (roadmap_id, week, document) VALUES (?, ?, ?)",
+                    [(roadmap_id, week, d.decode("utf-8") if isinstance(d, bytes) else d) for week, d in weeks.items()]
+                )
+        except sqlite3.IntegrityError:
+            pass  # the roadmap was compacted away while its weeks were being generated
+
+    def get_document(self, roadmap_id: str) -> Optional[tuple]:
+        """(serialized roadmap, progress, total_weeks, created_at) without decoding the roadmap"""
+        row = self._connection().execute(
+            "SELECT r.document, p.data, r.total_weeks, r.created_at FROM roadmaps r "
+            "JOIN progress p ON p.roadmap_id = r.roadmap_id WHERE r.roadmap_id = ?",
+            (roadmap_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2], row[3]
+
+    def update_progress(self, roadmap_id: str, apply: Callable[[dict, int], None],
+                        note: Optional[dict] = None) -> Tuple[dict, int]:
+        """Atomically read, modify and write progress (plus an optional note); raises KeyError if the roadmap is unknown"""
+        conn = self._connection()
+        with conn:
+            # IMMEDIATE takes the write lock up front so concurrent workers serialize cleanly
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT p.data, r.total_weeks FROM progress p "
+                "JOIN roadmaps r ON r.roadmap_id = p.roadmap_id WHERE p.roadmap_id = ?",
+                (roadmap_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(roadmap_id)
+            progress = json.loads(row[0])
+            apply(progress, row[1])
+            if note is not None:
+                progress["notes_total"] += 1
+                conn.execute(
+                    "INSERT INTO progress_notes (roadmap_id, seq, week, note, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (roadmap_id, progress["notes_total"], note["week"], note["note"], note["timestamp"])
+                )
+                # Keep only the newest max_notes; seqs stay contiguous so this is one range delete
+                conn.execute(
+                    "DELETE FROM progress_notes WHERE roadmap_id = ? AND seq <= ?",
+                    (roadmap_id, progress["notes_total"] - self.max_notes)
+                )
+            conn.execute(
+                "UPDATE progress SET data = ?, updated_at = ? WHERE roadmap_id = ?",
+                (json.dumps(progress), datetime.now().isoformat(), roadmap_id)
+            )
+        return progress, row[1]
+
+    def update_progress_batch(self, roadmap_id: str, events: list, apply: Callable) -> Tuple[list, dict, int]:
+        """Apply (idempotency_key, event) pairs in one transaction; see progress.apply_events"""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT p.data, r.total_weeks FROM progress p "
+                "JOIN roadmaps r ON r.roadmap_id = p.roadmap_id WHERE p.roadmap_id = ?",
+                (roadmap_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(roadmap_id)
+            progress, total_weeks = json.loads(row[0]), row[1]
+
+            batch_keys = list({key for key, _ in events if key is not None})
+            seen = set()
+            for start in range(0, len(batch_keys), 500):
+                chunk = batch_keys[start:start + 500]
+                seen.update(key for (key,) in conn.execute(
+                    "SELECT idempotency_key FROM progress_events WHERE roadmap_id = ? AND idempotency_key IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    (roadmap_id, *chunk)
+                ))
+
+            outcomes, notes, keys = apply_events(progress, total_weeks, events, seen, apply)
+            conn.executemany(
+                "INSERT INTO progress_events (roadmap_id, idempotency_key) VALUES (?, ?)",
+                [(roadmap_id, key) for key in keys]
+            )
+            if notes:
+                conn.executemany(
+                    "INSERT INTO progress_notes (roadmap_id, seq, week, note, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    [(roadmap_id, n["seq"], n["week"], n["note"], n["timestamp"]) for n in notes]
+                )
+                conn.execute(
+                    "DELETE FROM progress_notes WHERE roadmap_id = ? AND seq <= ?",
+                    (roadmap_id, progress["notes_total"] - self.max_notes)
+                )
+            conn.execute(
+                "UPDATE progress SET data = ?, updated_at = ? WHERE roadmap_id = ?",
+                (json.dumps(progress), datetime.now().isoformat(), roadmap_id)
+            )
+        return outcomes, progress, total_weeks
+
+    def get_notes(self, roadmap_id: str, offset: int, limit: int) -> Optional[Tuple[List[dict], int]]:
+        """A page of the retained notes, oldest first, and how many are retained"""
+        row = self._connection().execute("SELECT data FROM progress WHERE roadmap_id = ?", (roadmap_id,)).fetchone()
+        if row is None:
+            return None
+        total = json.loads(row[0])["notes_total"]
+        retained = min(total, self.max_notes)
+        first = total - retained + 1 + offset
+        rows = self._connection().execute(
+            "SELECT seq, week, note, timestamp FROM progress_notes "
+            "WHERE roadmap_id = ? AND seq BETWEEN ? AND ? ORDER BY seq",
+            (roadmap_id, first, min(total, first + limit - 1))
+        ).fetchall()
+        notes = [{"seq": seq, "week": week, "note": note, "timestamp": ts} for seq, week, note, ts in rows]
+        return notes, retained
+
+    def compact(self, ttl: timedelta) -> int:
+        """Delete roadmaps (and their progress) created before now - ttl"""
+        cutoff = (datetime.now() - ttl).isoformat()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute("DELETE FROM roadmaps WHERE created_at < ?", (cutoff,)).rowcount
+        return deleted
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM roadmaps").fetchone()[0]
+
+
+def store_from_env():
+    """Build the store from ROADMAP_STORE / ROADMAP_DB_PATH / ROADMAP_MAX_NOTES environment settings"""
+    backend = os.getenv("ROADMAP_STORE", "sqlite")
+    max_notes = int(os.getenv("ROADMAP_MAX_NOTES", "500"))
+    if backend == "sqlite":
+        return SQLiteStore(os.getenv("ROADMAP_DB_PATH", "roadmaps.db"), max_notes)
+    if backend == "memory":
+        if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+            raise ValueError("ROADMAP_STORE=memory is per process; use sqlite with WEB_CONCURRENCY > 1")
+        return MemoryStore(max_notes)
+    raise ValueError(f"Unknown ROADMAP_STORE: {backend}")
@@ -0,0 +1,60 @@
+# templates.py - PRE-SERIALIZED ROADMAP FRAGMENTS AND FAST JSON HELPERS
+import json
+from typing import Any, Callable, Dict, Iterable
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to the stdlib encoder
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    """Compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fields(mapping: dict, keys: Iterable[str]) -> bytes:
+    """'"k1":v1,"k2":v2' for the given keys, ready to splice into an object"""
+    return dumps({key: mapping[key] for key in keys})[1:-1]
+
+
+def join_object(*parts: bytes) -> bytes:
+    """Splice field fragments into one JSON object"""
+    return b"{" + b",".join(part for part in parts if part) + b"}"
+
+
+def join_array(items: Iterable[bytes]) -> bytes:
+    return b"[" + b",".join(items) + b"]"
+
+
+class TemplateCache:
+    """Per-topic compiled fragments, rebuilt whenever the catalog snapshot changes"""
+
+    def __init__(self, compile_topic: Callable):
+        self._compile_topic = compile_topic
+        self._version = None
+        self._templates: Dict[str, dict] = {}
+
+    def get(self, content, topic: str) -> dict:
+        if content.version != self._version:
+            self._templates = {}
+            self._version = content.version
+        template = self._templates.get(topic)
+        if template is None:
+            template = self._templates[topic] = self._compile_topic(content, topic)
+        return template
+
+    def warm(self, content, topics: Iterable[str]):
+        for topic in topics:
+            self.get(content, topic)
@@ -0,0 +1,5 @@
+# conftest.py - MAKE THE TOP-LEVEL MODULES IMPORTABLE FROM tests/
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,162 @@
+# test_circuit_breaker.py - BREAKER STATE MACHINE AND ADAPTIVE DEADLINE
+from circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(**overrides) -> tuple:
+    clock = FakeClock()
+    settings = {"window_seconds": 60.0, "min_calls": 4, "failure_threshold": 0.5, "open_seconds": 15.0,
+                "deadline_floor": 2.0, "deadline_ceiling": 30.0, "deadline_factor": 1.5, "clock": clock}
+    settings.update(overrides)
+    return CircuitBreaker(**settings), clock
+
+
+def trip(breaker: CircuitBreaker):
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record_failure(0.1)
+
+
+def test_opens_on_error_rate_once_min_calls_reached():
+    breaker, _ = make_breaker()
+    for _ in range(3):
+        breaker.allow()
+        breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.stats()["rejected_calls"] == 1
+    assert breaker.stats()["times_opened"] == 1
+
+
+def test_stays_closed_below_threshold():
+    breaker, _ = make_breaker()
+    for ok in (True, True, True, False, True, True):
+        breaker.allow()
+        if ok:
+            breaker.record_success(0.1)
+        else:
+            breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failures_age_out_of_the_window():
+    breaker, clock = make_breaker()
+    for _ in range(3):
+        breaker.allow()
+        breaker.record_failure(0.1)
+    clock.now += 61
+    breaker.allow()
+    breaker.record_failure(0.1)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_after_cooldown_allows_limited_trials():
+    breaker, clock = make_breaker(half_open_max_calls=1)
+    trip(breaker)
+    clock.now += 14.9
+    assert not breaker.allow()
+
+    clock.now += 0.1
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_half_open_success_closes_and_clears_the_window():
+    breaker, clock = make_breaker()
+    trip(breaker)
+    clock.now += 15
+    assert breaker.allow()
+    breaker.record_success(0.2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["window_calls"] == 1
+    assert breaker.stats()["window_failure_rate"] == 0.0
+
+
+def test_half_open_failure_reopens():
+    breaker, clock = make_breaker()
+    trip(breaker)
+    clock.now += 15
+    assert breaker.allow()
+    breaker.record_failure(0.2)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["times_opened"] == 2
+    clock.now += 14
+    assert not breaker.allow()
+
+
+def test_released_trial_frees_its_half_open_slot():
+    breaker, clock = make_breaker(half_open_max_calls=1)
+    trip(breaker)
+    clock.now += 15
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # The trial call was cancelled (e.g. lost a hedge race) without an outcome
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_release_outside_half_open_is_a_no_op():
+    breaker, _ = make_breaker()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_deadline_is_the_ceiling_until_min_calls_successes():
+    breaker, _ = make_breaker()
+    for _ in range(3):
+        breaker.record_success(1.0)
+    assert breaker.deadline() == 30.0
+
+
+def test_deadline_tracks_p99_of_successes():
+    breaker, _ = make_breaker(min_calls=10)
+    for i in range(100):
+        breaker.record_success(1.0 + i / 100)
+    # 100 samples: p99 is the largest, 1.99
+    assert breaker.deadline() == 1.99 * 1.5
+
+
+def test_deadline_ignores_failed_calls():
+    breaker, _ = make_breaker(failure_threshold=1.1)
+    for _ in range(10):
+        breaker.record_success(2.0)
+    for _ in range(10):
+        breaker.record_failure(29.0)
+    assert breaker.deadline() == 3.0
+
+
+def test_deadline_is_clamped_to_floor_and_ceiling():
+    fast, _ = make_breaker()
+    for _ in range(10):
+        fast.record_success(0.05)
+    assert fast.deadline() == 2.0
+
+    slow, _ = make_breaker()
+    for _ in range(10):
+        slow.record_success(25.0)
+    assert slow.deadline() == 30.0
+
+
+def test_deadline_falls_back_to_ceiling_when_samples_age_out():
+    breaker, clock = make_breaker()
+    for _ in range(10):
+        breaker.record_success(1.0)
+    assert breaker.deadline() == 2.0
+    clock.now += 61
+    assert breaker.deadline() == 30.0
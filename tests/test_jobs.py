@@ -0,0 +1,129 @@
+# test_jobs.py - CALLBACK URL GUARD, QUEUE BACKPRESSURE AND WORKER SURVIVAL
+import asyncio
+import socket
+
+import pytest
+
+import jobs
+from jobs import FAILED, SUCCEEDED, JobQueue, MemoryJobStore, QueueFull, callback_error
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/callback",
+    "http://127.1.2.3:8080/callback",
+    "http://localhost:8080/callback",
+    "http://[::1]/callback",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.1/callback",
+    "http://192.168.1.10/callback",
+    "http://0.0.0.0/callback",
+    "http://[::ffff:10.0.0.1]/callback",
+    "http://[::ffff:127.0.0.1]/callback",
+    "http://[fe80::1]/callback",
+])
+def test_non_public_addresses_are_refused(url):
+    assert "non-public" in callback_error(url)
+
+
+def test_public_address_is_allowed():
+    assert callback_error("https://93.184.216.34/hooks/roadmap") is None
+
+
+@pytest.mark.parametrize("url", ["ftp://93.184.216.34/x", "/relative/path", "http:///no-host", "file:///etc/passwd"])
+def test_only_absolute_http_urls(url):
+    assert callback_error(url) == "callback_url must be an absolute http(s) URL"
+
+
+def test_invalid_port():
+    assert callback_error("http://93.184.216.34:99999/") == "callback_url is not a valid URL"
+
+
+def test_hostname_resolving_to_a_private_address_is_refused(monkeypatch):
+    def resolve(host, port, **kwargs):
+        # One public and one private answer: any non-public address refuses the host
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, port)) for ip in ("93.184.216.34", "10.1.2.3")]
+
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", resolve)
+    assert callback_error("https://hooks.example.com/x") == "callback host hooks.example.com resolves to a non-public address"
+
+
+def test_unresolvable_host_is_refused(monkeypatch):
+    def resolve(host, port, **kwargs):
+        raise socket.gaierror("no such host")
+
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", resolve)
+    assert callback_error("https://nowhere.invalid/x") == "callback host nowhere.invalid does not resolve"
+
+
+def test_allowed_hosts_replace_the_address_check():
+    allowed = ("127.0.0.1", "hooks.internal")
+    assert callback_error("http://127.0.0.1:9000/callback", allowed) is None
+    assert callback_error("http://HOOKS.internal/callback", allowed) is None
+    assert callback_error("https://93.184.216.34/x", allowed) == "callback host 93.184.216.34 is not allowed"
+
+
+def test_queue_allowed_hosts_are_case_insensitive():
+    queue = JobQueue(MemoryJobStore(), run=None, allowed_callback_hosts=["Hooks.Internal"])
+    assert asyncio.run(queue.check_callback("http://hooks.internal/cb")) is None
+
+
+def test_full_queue_raises_queue_full_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def run(payload):
+            await release.wait()
+            return b"{}"
+
+        store = MemoryJobStore()
+        queue = JobQueue(store, run, workers=1, max_queued=1)
+        queue.start()
+        running = await queue.submit({"n": 1})
+        await asyncio.sleep(0)
+        waiting = await queue.submit({"n": 2})
+        with pytest.raises(QueueFull) as rejected:
+            await queue.submit({"n": 3})
+        stats = queue.stats()
+        await queue.stop()
+        return store, running, waiting, rejected.value, stats
+
+    store, running, waiting, error, stats = asyncio.run(scenario())
+    assert error.retry_after >= 1
+    assert (stats["queued"], stats["running"], stats["rejected"]) == (1, 1, 1)
+    # stop() leaves no job queued or running forever
+    assert store.get(running["job_id"])["status"] == FAILED
+    assert store.get(waiting["job_id"])["status"] == FAILED
+
+
+class FlakyStore(MemoryJobStore):
+    """Fails the first update, as SQLite does with "database is locked" past its busy timeout"""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def update(self, job_id: str, **changes):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database is locked")
+        super().update(job_id, **changes)
+
+
+def test_worker_survives_a_store_error():
+    async def scenario():
+        async def run(payload):
+            return b'{"ok":true}'
+
+        store = FlakyStore()
+        queue = JobQueue(store, run, workers=1)
+        queue.start()
+        lost = await queue.submit({"n": 1})
+        done = await queue.submit({"n": 2})
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        return store, lost, done
+
+    store, lost, done = asyncio.run(scenario())
+    assert store.get(done["job_id"])["status"] == SUCCEEDED
+    # The job whose update failed stays queued until stale-job maintenance fails it
+    assert store.get(lost["job_id"])["status"] != SUCCEEDED
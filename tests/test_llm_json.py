@@ -0,0 +1,113 @@
+# test_llm_json.py - SALVAGING FENCED, WRAPPED, TRUNCATED AND STREAMED LLM JSON
+import json
+
+import pytest
+
+from llm_json import ArrayStreamParser, close_truncated, extract_json
+
+STRUCTURE = {
+    "title": "Learn Python",
+    "overview": "Four weeks",
+    "weeks": [
+        {"theme": "Basics", "focus": "Syntax", "objectives": ["Install", "Variables"]},
+        {"theme": "Data", "focus": "Collections", "objectives": ["Lists", "Dicts"]},
+        {"theme": "Functions", "focus": "Reuse", "objectives": ["Scope", "Closures"]},
+        {"theme": "Projects", "focus": "Build", "objectives": ["CLI app"]}
+    ]
+}
+TEXT = json.dumps(STRUCTURE)
+
+
+def test_clean_json_needs_no_repairs():
+    assert extract_json(TEXT) == (STRUCTURE, [])
+
+
+def test_fenced_json():
+    value, repairs = extract_json(f"```json\n{TEXT}\n```")
+    assert value == STRUCTURE
+    assert repairs == ["fence"]
+
+
+def test_unclosed_fence():
+    value, repairs = extract_json(f"```\n{TEXT}")
+    assert value == STRUCTURE
+    assert repairs == ["fence"]
+
+
+def test_prose_around_the_object():
+    value, repairs = extract_json(f"Here is your roadmap:\n{TEXT}\nGood luck!")
+    assert value == STRUCTURE
+    assert repairs == ["prose"]
+
+
+def test_no_object_raises():
+    with pytest.raises(ValueError):
+        extract_json("Sorry, I cannot help with that.")
+
+
+def test_truncated_document_keeps_only_complete_weeks():
+    # Cut off inside week 3's objectives, as at max_tokens
+    cut = TEXT.index('"Closures"')
+    value, repairs = extract_json(TEXT[:cut])
+    assert repairs == ["truncated"]
+    assert value["title"] == "Learn Python"
+    assert value["weeks"] == STRUCTURE["weeks"][:2]
+
+
+def test_truncated_inside_a_string():
+    cut = TEXT.index("Collections") + 4
+    value, _ = extract_json(TEXT[:cut])
+    assert value["weeks"] == STRUCTURE["weeks"][:1]
+
+
+def test_truncated_with_escaped_quote():
+    text = '{"title": "Say \\"hi\\"", "weeks": [{"theme": "a\\"b"}, {"theme": "c'
+    value, _ = extract_json(text)
+    assert value == {"title": 'Say "hi"', "weeks": [{"theme": 'a"b'}]}
+
+
+def test_close_truncated_max_open_controls_depth():
+    text = '{"weeks": [{"theme": "Basics", "objectives": ["Install", "Vari'
+    assert close_truncated(text) == {"weeks": []}
+    assert close_truncated(text, max_open=3) == {"weeks": [{"theme": "Basics"}]}
+    assert close_truncated(text, max_open=4) == {"weeks": [{"theme": "Basics", "objectives": ["Install"]}]}
+
+
+def test_close_truncated_before_the_first_value():
+    assert close_truncated('{"ti') == {}
+    with pytest.raises(ValueError):
+        close_truncated('{"ti', max_open=0)
+
+
+def test_stream_parser_yields_each_week_once_complete():
+    parser = ArrayStreamParser("weeks")
+    seen = []
+    for end in range(1, len(TEXT) + 1):
+        seen.extend(parser.feed(TEXT[:end]))
+    assert seen == STRUCTURE["weeks"]
+    assert parser.closed
+    assert parser.items == STRUCTURE["weeks"]
+
+
+def test_stream_parser_holds_back_a_trailing_number():
+    parser = ArrayStreamParser("hours")
+    assert parser.feed('{"hours": [10, 1') == [10]
+    assert parser.feed('{"hours": [10, 15') == []
+    assert parser.feed('{"hours": [10, 15]') == [15]
+
+
+def test_truncated_stream_salvages_only_the_finished_weeks():
+    # The stream dies partway through week 3: the parser has emitted weeks 1-2 and
+    # extract_json recovers the header from the same text
+    cut = TEXT.index('"Functions"') + 5
+    parser = ArrayStreamParser("weeks")
+    weeks = []
+    for end in range(1, cut + 1):
+        weeks.extend(parser.feed(TEXT[:end]))
+    assert weeks == STRUCTURE["weeks"][:2]
+    assert not parser.closed
+
+    value, repairs = extract_json(TEXT[:cut])
+    assert repairs == ["truncated"]
+    assert (value["title"], value["overview"]) == ("Learn Python", "Four weeks")
+    assert value["weeks"] == weeks
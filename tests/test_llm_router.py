@@ -0,0 +1,143 @@
+# test_llm_router.py - ROUTING, FAILOVER AND HEDGING AGAINST IN-PROCESS MOCK BACKENDS
+import asyncio
+import json
+import random
+import time
+
+import httpx
+
+from benchmarks.mock_openrouter import create_app
+from llm_client import AsyncLLMClient
+from llm_router import Backend, LLMRouter, router_from_env
+
+PAYLOAD = {"messages": [{"role": "system", "content": "Return ONLY JSON."},
+                        {"role": "user", "content": "Goal: learn python"}]}
+
+
+def mock_backend(name: str, weight: float = 1.0, attempt_timeout: float = 5.0, **mock) -> Backend:
+    """Backend whose client talks to benchmarks/mock_openrouter.py through an ASGI transport"""
+    app = create_app(**mock)
+    client = AsyncLLMClient(api_key="test", base_url="http://mock/api/v1", attempt_timeout=attempt_timeout,
+                            max_attempts=1, transport=httpx.ASGITransport(app=app))
+    backend = Backend(name, client, "mock-model", weight)
+    backend.app = app
+    return backend
+
+
+def make_router(*backends: Backend, hedge_after: float = 1.5) -> LLMRouter:
+    return LLMRouter(list(backends), hedge_after=hedge_after, explore=0.0, rng=random.Random(0))
+
+
+def title(result: dict) -> str:
+    return json.loads(result["choices"][0]["message"]["content"])["title"]
+
+
+def test_prefers_the_lowest_latency_per_weight():
+    async def scenario():
+        slow = mock_backend("slow", latency=0.05)
+        fast = mock_backend("fast", latency=0.0)
+        router = make_router(slow, fast)
+        for _ in range(4):
+            await router.chat(PAYLOAD)
+        return router, slow, fast
+
+    router, slow, fast = asyncio.run(scenario())
+    assert [backend.name for backend in router.ranked()] == ["fast", "slow"]
+    assert slow.app.state.calls == 1
+    assert fast.app.state.calls == 3
+
+
+def test_failing_backend_fails_over_at_once_and_drops_in_the_ranking():
+    async def scenario():
+        broken = mock_backend("broken", error_rate=1.0)
+        healthy = mock_backend("healthy")
+        router = make_router(broken, healthy)
+        started = time.perf_counter()
+        first = await router.chat(PAYLOAD)
+        elapsed = time.perf_counter() - started
+        for _ in range(3):
+            await router.chat(PAYLOAD)
+        return router, broken, healthy, first, elapsed
+
+    router, broken, healthy, first, elapsed = asyncio.run(scenario())
+    assert title(first) == "Mock Roadmap: learn python"
+    # One attempt, no backoff, before the healthy backend is asked
+    assert elapsed < 0.2
+    assert broken.app.state.calls == 1
+    assert healthy.app.state.calls == 4
+    assert broken.score() > healthy.score()
+    assert router.ranked()[0] is healthy
+
+
+def test_invalid_answer_fails_over():
+    async def scenario():
+        first, second = mock_backend("first"), mock_backend("second")
+        router = make_router(first, second)
+
+        answers = []
+
+        def parse(result):
+            answers.append(result)
+            if len(answers) == 1:
+                raise ValueError("unusable")
+            return result
+
+        await router.chat(PAYLOAD, parse=parse)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert (first.app.state.calls, second.app.state.calls) == (1, 1)
+
+
+def test_slow_primary_is_hedged():
+    async def scenario():
+        slow = mock_backend("slow", latency=0.5)
+        fast = mock_backend("fast", latency=0.0)
+        router = make_router(slow, fast, hedge_after=0.05)
+        started = time.perf_counter()
+        await router.chat(PAYLOAD)
+        return router, time.perf_counter() - started
+
+    router, elapsed = asyncio.run(scenario())
+    assert elapsed < 0.4
+    assert (router.hedges, router.hedge_wins) == (1, 1)
+
+
+def test_open_breaker_skips_the_backend():
+    async def scenario():
+        tripped, healthy = mock_backend("tripped"), mock_backend("healthy")
+        for _ in range(tripped.breaker.min_calls):
+            tripped.breaker.allow()
+            tripped.breaker.record_failure(0.1)
+        router = make_router(tripped, healthy)
+        await router.chat(PAYLOAD)
+        return tripped, healthy
+
+    tripped, healthy = asyncio.run(scenario())
+    assert tripped.app.state.calls == 0
+    assert healthy.app.state.calls == 1
+
+
+def test_stream_fails_over_before_the_first_delta():
+    async def scenario():
+        broken, healthy = mock_backend("broken", error_rate=1.0), mock_backend("healthy")
+        router = make_router(broken, healthy)
+        text = "".join([delta async for delta in router.stream_chat(PAYLOAD)])
+        return broken, healthy, text
+
+    broken, healthy, text = asyncio.run(scenario())
+    assert json.loads(text)["title"] == "Mock Roadmap: learn python"
+    assert broken.app.state.calls == 1
+    assert broken.score() > healthy.score()
+
+
+def test_router_from_env_makes_single_attempts_only_with_several_backends(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setenv("LLM_MAX_ATTEMPTS", "3")
+    monkeypatch.delenv("LLM_BACKENDS", raising=False)
+    assert [backend.client.max_attempts for backend in router_from_env().backends] == [3]
+
+    monkeypatch.setenv("LLM_BACKENDS", json.dumps([{"name": "a"}, {"name": "b", "weight": 2}]))
+    router = router_from_env()
+    assert [backend.client.max_attempts for backend in router.backends] == [1, 1]
+    assert [backend.weight for backend in router.backends] == [1.0, 2.0]
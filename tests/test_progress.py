@@ -0,0 +1,130 @@
+# test_progress.py - BITMASK PROGRESS STATE, RUNNING COUNTERS AND IDEMPOTENT EVENTS
+from progress import apply_events, is_marked, mark, new_progress, progress_stats, progress_view, upgrade_progress, weeks_in
+
+
+def test_mark_sets_bits_and_counts_each_week_once():
+    progress = new_progress()
+    assert mark(progress, "weeks", 1)
+    assert mark(progress, "weeks", 3)
+    assert not mark(progress, "weeks", 3)
+    assert progress["weeks_mask"] == 0b101
+    assert progress["weeks_done"] == 2
+    assert progress["projects_done"] == 0
+
+
+def test_weeks_and_projects_are_independent():
+    progress = new_progress()
+    mark(progress, "projects", 2)
+    assert is_marked(progress, "projects", 2)
+    assert not is_marked(progress, "weeks", 2)
+
+
+def test_is_marked_bounds():
+    progress = new_progress()
+    mark(progress, "weeks", 52)
+    assert is_marked(progress, "weeks", 52)
+    assert not is_marked(progress, "weeks", 51)
+    assert not is_marked(progress, "weeks", 53)
+    assert not is_marked(progress, "weeks", 0)
+
+
+def test_weeks_in_lists_set_bits_ascending():
+    assert weeks_in(0) == []
+    assert weeks_in(0b1011) == [1, 2, 4]
+    assert weeks_in(1 << 51) == [52]
+
+
+def test_stats_come_from_the_counters():
+    progress = new_progress()
+    for week in (1, 2, 3):
+        mark(progress, "weeks", week)
+    mark(progress, "projects", 1)
+    assert progress_stats(progress, 12) == {
+        "progress_percentage": 25.0,
+        "completed_weeks": 3,
+        "completed_projects": 1,
+        "total_weeks": 12
+    }
+    assert progress_stats(new_progress(), 0)["progress_percentage"] == 0
+
+
+def test_view_expands_masks():
+    progress = new_progress()
+    mark(progress, "weeks", 4)
+    mark(progress, "weeks", 2)
+    progress["notes_total"] = 3
+    assert progress_view(progress) == {"completed_weeks": [2, 4], "completed_projects": [], "notes_total": 3}
+
+
+def test_upgrade_converts_lists_and_drops_bad_entries():
+    legacy = {"completed_weeks": [2, 1, 2, 0, "3"], "completed_projects": [1], "notes": [{"text": "a"}, {"text": "b"}]}
+    progress = upgrade_progress(legacy)
+    assert progress_view(progress) == {"completed_weeks": [1, 2], "completed_projects": [1], "notes_total": 2}
+    assert progress["weeks_done"] == 2
+    assert progress["projects_done"] == 1
+
+
+def test_upgrade_passes_compact_progress_through():
+    progress = new_progress()
+    assert upgrade_progress(progress) is progress
+
+
+def complete_week(progress: dict, total_weeks: int, event: dict):
+    """The shape of main.apply_progress_event: mark the week, reject out-of-range ones, return a note"""
+    if not 1 <= event["week"] <= total_weeks:
+        raise ValueError(f"week_completed must be between 1 and {total_weeks}")
+    mark(progress, "weeks", event["week"])
+    return {"text": event["note"]} if event.get("note") else None
+
+
+def test_apply_events_folds_in_order_and_numbers_notes():
+    progress = new_progress()
+    progress["notes_total"] = 5
+    events = [("k1", {"week": 1, "note": "done"}), ("k2", {"week": 2}), ("k3", {"week": 3, "note": "hard"})]
+    outcomes, notes, keys = apply_events(progress, 4, events, set(), complete_week)
+    assert outcomes == [("applied", None)] * 3
+    assert notes == [{"seq": 6, "text": "done"}, {"seq": 7, "text": "hard"}]
+    assert keys == ["k1", "k2", "k3"]
+    assert progress["weeks_done"] == 3
+    assert progress["notes_total"] == 7
+
+
+def test_apply_events_skips_keys_seen_in_earlier_batches():
+    progress = new_progress()
+    seen = {"k1"}
+    outcomes, notes, keys = apply_events(progress, 4, [("k1", {"week": 1, "note": "again"})], seen, complete_week)
+    assert outcomes == [("duplicate", None)]
+    assert notes == [] and keys == []
+    assert progress["weeks_done"] == 0
+
+
+def test_apply_events_key_repeated_within_one_batch_counts_once():
+    progress = new_progress()
+    seen = set()
+    events = [("k1", {"week": 1, "note": "first"}), ("k1", {"week": 2, "note": "retry"}), ("k2", {"week": 2})]
+    outcomes, notes, keys = apply_events(progress, 4, events, seen, complete_week)
+    assert [status for status, _ in outcomes] == ["applied", "duplicate", "applied"]
+    assert notes == [{"seq": 1, "text": "first"}]
+    assert keys == ["k1", "k2"]
+    assert seen == {"k1", "k2"}
+    assert progress_view(progress)["completed_weeks"] == [1, 2]
+
+
+def test_apply_events_rejected_key_can_be_retried():
+    progress = new_progress()
+    seen = set()
+    events = [("k1", {"week": 9}), ("k1", {"week": 3})]
+    outcomes, _, keys = apply_events(progress, 4, events, seen, complete_week)
+    assert outcomes == [("rejected", "week_completed must be between 1 and 4"), ("applied", None)]
+    assert keys == ["k1"]
+    assert progress_view(progress)["completed_weeks"] == [3]
+
+
+def test_apply_events_without_keys_always_apply():
+    progress = new_progress()
+    events = [(None, {"week": 1, "note": "a"}), (None, {"week": 1, "note": "a"})]
+    outcomes, notes, keys = apply_events(progress, 4, events, set(), complete_week)
+    assert outcomes == [("applied", None)] * 2
+    assert [note["seq"] for note in notes] == [1, 2]
+    assert keys == []
+    assert progress["weeks_done"] == 1
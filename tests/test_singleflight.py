@@ -0,0 +1,103 @@
+# test_singleflight.py - COALESCING OF CONCURRENT IDENTICAL CALLS
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return {"title": "shared"}
+
+        callers = [asyncio.ensure_future(flight.do("python", generate)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def echo(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: echo(1)), flight.do("b", lambda: echo(2)))
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert results == [1, 2]
+    assert flight.leaders == 2
+    assert flight.coalesced == 0
+
+
+def test_finished_call_is_not_reused():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+
+        async def generate():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        first = await flight.do("python", generate)
+        second = await flight.do("python", generate)
+        return first, second
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_error_reaches_every_waiter_and_clears_the_key():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(flight.do("python", fail), flight.do("python", fail), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["upstream down", "upstream down"]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def generate():
+            await release.wait()
+            return "done"
+
+        leaving = asyncio.ensure_future(flight.do("python", generate))
+        staying = asyncio.ensure_future(flight.do("python", generate))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        return leaving, await staying
+
+    leaving, result = asyncio.run(scenario())
+    assert result == "done"
+    with pytest.raises(asyncio.CancelledError):
+        leaving.result()
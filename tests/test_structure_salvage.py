@@ -0,0 +1,100 @@
+# test_structure_salvage.py - PARTIAL LLM STRUCTURES ARE TRIMMED AND TOPPED UP FROM THE TEMPLATE
+import asyncio
+import json
+
+import pytest
+
+import main
+from cache import MemoryBackend, ResponseCache
+
+USER_INPUT = main.EnhancedUserInput(goal="learn python", proficiency="beginner", time_commitment="5h",
+                                    learning_style=["video"])
+
+
+def completion(content: str) -> dict:
+    return {"choices": [{"message": {"content": content}}], "usage": {"total_tokens": 42}}
+
+
+def test_truncated_response_keeps_weeks_present_in_every_list():
+    content = ('```json\n{"title": "T", "overview": "O", "weekly_themes": ["A", "B", "C", "D"], '
+               '"weekly_focus": ["fa", "fb"], "weekly_objectives": [["x"], ["y"], ["z')
+    structure, usage = main.parse_structure_response(completion(content))
+    assert structure["weekly_themes"] == ["A", "B"]
+    assert structure["weekly_focus"] == ["fa", "fb"]
+    assert structure["weekly_objectives"] == [["x"], ["y"]]
+    assert usage == {"total_tokens": 42}
+
+
+def test_response_without_a_complete_week_is_rejected():
+    content = '{"title": "T", "overview": "O", "weekly_themes": ["A"], "weekly_focus": [], "weekly_objectives": []}'
+    with pytest.raises(ValueError):
+        main.parse_structure_response(completion(content))
+
+
+def test_fill_from_template_tops_up_missing_weeks():
+    structure = {"title": "T", "overview": None, "weekly_themes": ["A", "B"], "weekly_focus": ["fa", "fb"],
+                 "weekly_objectives": [["x"], ["y"]]}
+    template = main.create_basic_structure(USER_INPUT)
+    assert main.fill_from_template(structure, template) == 2
+    assert structure["title"] == "T"
+    assert structure["overview"] == template["overview"]
+    assert structure["weekly_themes"] == ["A", "B"] + template["weekly_themes"][2:]
+    assert len(main.structure_weeks(structure)) == main.INITIAL_WEEKS
+
+
+def test_fill_from_template_leaves_complete_structures_alone():
+    template = main.create_basic_structure(USER_INPUT)
+    structure = json.loads(json.dumps(template))
+    assert main.fill_from_template(structure, template) == 0
+    assert structure == template
+
+
+class StreamingClient:
+    """Stands in for the LLM router: streams a fixed answer in small chunks"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+    async def stream_chat(self, payload: dict, timeout=None):
+        for start in range(0, len(self.text), 7):
+            yield self.text[start:start + 7]
+
+
+def run_stream(monkeypatch, answer: dict) -> tuple:
+    cache = ResponseCache(MemoryBackend(16))
+    monkeypatch.setattr(main, "response_cache", cache)
+    monkeypatch.setattr(main, "get_llm_client", lambda: StreamingClient(json.dumps(answer)))
+
+    async def collect():
+        return [event async for event in main.stream_ai_structure(USER_INPUT)]
+
+    events = asyncio.run(collect())
+    return events, cache
+
+
+def test_stream_repairs_and_caches_a_complete_answer(monkeypatch):
+    weeks = [{"theme": f"T{i}", "focus": f"F{i}", "objectives": f"O{i}"} for i in range(1, 5)]
+    events, cache = run_stream(monkeypatch, {"title": "T", "overview": "O", "weeks": weeks})
+    structure = events[-1][1]
+    assert [value for kind, value in events[:-1]] == [(f"T{i}", f"F{i}", [f"O{i}"]) for i in range(1, 5)]
+    assert structure["weekly_objectives"] == [[f"O{i}"] for i in range(1, 5)]
+    assert cache.get(main.structure_cache_key(USER_INPUT)) == structure
+
+
+def test_stream_week_failing_the_schema_is_salvaged_like_truncation(monkeypatch):
+    weeks = [
+        {"theme": "A", "focus": "fa", "objectives": "single objective"},
+        {"theme": 7, "focus": None, "objectives": ["x"]},
+        {"theme": "C", "focus": "fc", "objectives": ["y"]},
+        {"theme": "D", "focus": "fd", "objectives": ["z"]}
+    ]
+    events, cache = run_stream(monkeypatch, {"title": 3, "overview": "O", "weeks": weeks})
+    template = main.create_basic_structure(USER_INPUT)
+    structure = events[-1][1]
+    assert [value for kind, value in events[:-1]] == main.structure_weeks(structure)
+    assert structure["weekly_themes"] == ["A"] + template["weekly_themes"][1:]
+    assert structure["weekly_objectives"][0] == ["single objective"]
+    assert all(isinstance(theme, str) for theme in structure["weekly_themes"])
+    assert structure["title"] == template["title"]
+    # Partial answers are served but not cached
+    assert cache.get(main.structure_cache_key(USER_INPUT)) is None
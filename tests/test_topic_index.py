@@ -0,0 +1,64 @@
+# test_topic_index.py - WORD-BOUNDARY, WEIGHTED TOPIC CLASSIFICATION
+import pytest
+
+from topic_index import TOPIC_KEYWORDS, TopicIndex, tokenize
+
+index = TopicIndex(TOPIC_KEYWORDS)
+
+
+@pytest.mark.parametrize("goal, topic", [
+    ("learn python", "python"),
+    ("build websites with react", "web"),
+    ("get into data science", "data"),
+    ("learn cooking", "general"),
+])
+def test_classify(goal, topic):
+    assert index.classify(goal) == topic
+
+
+def test_keywords_match_whole_words_only():
+    # "ai" inside "email", "ml" inside "html", "data" inside "database"
+    assert index.scores("master email marketing") == {}
+    assert index.classify("master email marketing") == "general"
+    assert "data" not in index.scores("learn html")
+    assert index.scores("database administration") == {}
+
+
+def test_stronger_topic_beats_an_earlier_weaker_one():
+    # The old ordered scan returned "python" for any goal mentioning coding
+    assert index.scores("coding for data") == {"python": 1, "data": 1.5}
+    assert index.classify("coding for data") == "data"
+    assert index.classify("coding for data science") == "data"
+
+
+def test_ties_go_to_the_earlier_topic():
+    assert index.scores("machine learning with python") == {"python": 3, "data": 3}
+    assert index.classify("machine learning with python") == "python"
+
+    table = {"first": {"shared": 1}, "second": {"shared": 1}}
+    assert TopicIndex(table).classify("shared") == "first"
+    assert TopicIndex(dict(reversed(list(table.items())))).classify("shared") == "second"
+
+
+def test_multi_word_phrases():
+    assert index.scores("machine learning") == {"data": 3}
+    # Punctuation and case do not split a phrase differently from spaces
+    assert index.scores("Full-Stack apps") == {"web": 2}
+    assert index.scores("front end basics") == {"web": 2}
+    # A phrase and its own words both count: "web" + "web development"
+    assert index.scores("web development") == {"web": 5}
+    # Words of a phrase that are not adjacent do not make the phrase
+    assert index.scores("machine shop learning") == {}
+
+
+def test_each_phrase_counts_once():
+    assert index.scores("python python python") == {"python": 3}
+
+
+def test_scores_add_up_across_topics():
+    assert index.scores("django website with pandas analytics") == {"python": 2, "web": 2, "data": 3.5}
+
+
+def test_custom_default_and_tokenizer():
+    assert TopicIndex(TOPIC_KEYWORDS, default="other").classify("") == "other"
+    assert tokenize("C++ and C# in 2024!") == ["c++", "and", "c#", "in", "2024"]
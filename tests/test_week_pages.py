@@ -0,0 +1,77 @@
+# test_week_pages.py - LATER WEEKS ARE STORED ONLY WHEN THE LLM PRODUCED THEM
+import asyncio
+import json
+
+import main
+from cache import MemoryBackend, ResponseCache
+from storage import MemoryStore
+
+USER_INPUT = main.EnhancedUserInput(goal="learn python", proficiency="beginner", time_commitment="5h",
+                                    learning_style=["video"], weeks=12)
+PLAN = {"input": USER_INPUT.model_dump(), "topic": "python", "title": "Learn Python", "total_weeks": 12,
+        "themes": ["A", "B", "C", "D"]}
+
+
+class PageClient:
+    """Stands in for the LLM router: answers every week page with `weeks` generated weeks"""
+
+    def __init__(self, weeks: int):
+        self.weeks = weeks
+
+    async def chat(self, payload: dict, timeout=None, parse=None):
+        content = json.dumps({
+            "weekly_themes": [f"LLM {i}" for i in range(self.weeks)],
+            "weekly_focus": [f"Focus {i}" for i in range(self.weeks)],
+            "weekly_objectives": [[f"Objective {i}"] for i in range(self.weeks)]
+        })
+        return parse({"choices": [{"message": {"content": content}}], "usage": {}})
+
+
+def setup(monkeypatch, client) -> MemoryStore:
+    store = MemoryStore()
+    store.save_roadmap("r1", {"total_weeks": 12, "weekly_plan": []}, "2024-01-01T00:00:00", PLAN)
+    monkeypatch.setattr(main, "store", store)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(MemoryBackend(16)))
+    monkeypatch.setattr(main, "get_llm_client", lambda: client)
+    return store
+
+
+def generate(first: int) -> dict:
+    return {week: json.loads(document) for week, document in asyncio.run(main.generate_week_page("r1", PLAN, first)).items()}
+
+
+def test_template_page_is_served_pending_and_not_stored(monkeypatch):
+    store = setup(monkeypatch, None)
+    weeks = generate(5)
+    assert sorted(weeks) == [5, 6, 7, 8]
+    assert all(week["pending"] for week in weeks.values())
+    assert store.get_weeks("r1", 5, 8) == {}
+    assert all(week["pending"] for week in main.later_weeks("r1", 4, 12, "python"))
+
+
+def test_partial_llm_page_is_not_stored(monkeypatch):
+    store = setup(monkeypatch, PageClient(2))
+    weeks = generate(5)
+    assert [weeks[week]["theme"] for week in (5, 6)] == ["LLM 0", "LLM 1"]
+    assert all(week["pending"] for week in weeks.values())
+    assert store.get_weeks("r1", 5, 8) == {}
+
+
+def test_complete_llm_page_is_stored(monkeypatch):
+    store = setup(monkeypatch, PageClient(4))
+    weeks = generate(5)
+    assert [weeks[week]["theme"] for week in range(5, 9)] == ["LLM 0", "LLM 1", "LLM 2", "LLM 3"]
+    assert not any("pending" in week for week in weeks.values())
+    assert sorted(store.get_weeks("r1", 5, 8)) == [5, 6, 7, 8]
+
+    later = main.later_weeks("r1", 4, 12, "python")
+    assert [week.get("pending", False) for week in later] == [False] * 4 + [True] * 4
+
+
+def test_initial_weeks_keep_the_original_project_choice():
+    content = main.catalog.current
+    projects = [project["title"] for project in content.projects("python")]
+    chosen = [projects.index(main.build_week(i, "", "", [], content, "python")["project"]["title"]) for i in range(8)]
+    # Weeks 1..INITIAL_WEEKS: one project each, the last repeating; later weeks cycle
+    assert chosen[:main.INITIAL_WEEKS] == [min(i, len(projects) - 1) for i in range(main.INITIAL_WEEKS)]
+    assert chosen[main.INITIAL_WEEKS:] == [i % len(projects) for i in range(main.INITIAL_WEEKS, 8)]
@@ -0,0 +1,77 @@
+# topic_index.py - DATA-DRIVEN TOPIC CLASSIFIER
+import re
+from typing import Dict, List, Tuple
+
+# Keyword/alias table: topic -> {phrase: weight}. Multi-word phrases are more
+# specific, so they carry more weight. Earlier topics win ties.
+TOPIC_KEYWORDS = {
+    "python": {
+        "python": 3, "django": 2, "flask": 2, "fastapi": 2,
+        "programming": 1, "coding": 1, "software": 1, "scripting": 1,
+        "software engineering": 2, "automation": 1
+    },
+    "web": {
+        "web": 2, "web development": 3, "website": 2, "websites": 2,
+        "frontend": 2, "front end": 2, "backend": 1.5, "back end": 1.5,
+        "fullstack": 2, "full stack": 2, "html": 2, "css": 2,
+        "javascript": 2, "typescript": 2, "react": 2, "node": 1.5, "nodejs": 2
+    },
+    "data": {
+        "data": 1.5, "data science": 3, "data analysis": 3, "data engineering": 3,
+        "machine learning": 3, "deep learning": 3, "ml": 2, "ai": 2,
+        "artificial intelligence": 3, "analysis": 1, "analytics": 1.5,
+        "visualization": 1.5, "statistics": 1.5, "pandas": 2, "numpy": 2
+    }
+}
+
+_token = re.compile(r"[a-z0-9+#]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _token.findall(text.lower())
+
+
+class TopicIndex:
+    """Keyword table compiled into a phrase -> topic hash index
+
+    Matching walks the goal's word n-grams (up to the longest phrase) and
+    looks each one up, so cost depends on the goal length only, not on the
+    number of topics or keywords, and matches always fall on word boundaries.
+    """
+
+    def __init__(self, table: Dict[str, Dict[str, float]], default: str = "general"):
+        self.default = default
+        self.topics = list(table)
+        self._phrases: Dict[Tuple[str, ...], List[Tuple[int, float]]] = {}
+        self._max_words = 1
+        for topic_id, topic in enumerate(self.topics):
+            for phrase, weight in table[topic].items():
+                words = tuple(tokenize(phrase))
+                if not words:
+                    continue
+                self._phrases.setdefault(words, []).append((topic_id, weight))
+                self._max_words = max(self._max_words, len(words))
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Weighted score per matching topic; each distinct phrase counts once"""
+        words = tokenize(text)
+        matched = set()
+        for start in range(len(words)):
+            for end in range(start + 1, min(start + self._max_words, len(words)) + 1):
+                phrase = tuple(words[start:end])
+                if phrase in self._phrases:
+                    matched.add(phrase)
+
+        totals: Dict[int, float] = {}
+        for phrase in matched:
+            for topic_id, weight in self._phrases[phrase]:
+                totals[topic_id] = totals.get(topic_id, 0) + weight
+        return {self.topics[topic_id]: score for topic_id, score in sorted(totals.items())}
+
+    def classify(self, text: str) -> str:
+        """Highest-scoring topic, or the default when nothing matches"""
+        scores = self.scores(text)
+        if not scores:
+            return self.default
+        # scores is in table order and max() keeps the first maximum, so ties go to the earlier topic
+        return max(scores, key=scores.get)